@@ -0,0 +1,28 @@
+/* Streams finished eval results from the server.
+ *
+ * When the results manifest names a job id, the file is served by the
+ * /eval-file/ Flask route, which streams from disk instead of pushing
+ * the payload through the Dash store/base64 download path. Payloads
+ * without a job id fall through to the server-side download callback.
+ */
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+  evaldl: {
+    navigate: function (nClicks, manifestJson) {
+      if (!nClicks || !manifestJson) {
+        return window.dash_clientside.no_update;
+      }
+      var manifest;
+      try {
+        manifest =
+          typeof manifestJson === "string" ? JSON.parse(manifestJson) : manifestJson;
+      } catch (err) {
+        return window.dash_clientside.no_update;
+      }
+      if (manifest && manifest.job_id && manifest.results_path) {
+        window.location = "/eval-file/results/" + manifest.job_id;
+      }
+      return window.dash_clientside.no_update;
+    },
+  },
+});
@@ -0,0 +1,29 @@
+/* Debounced sync of the pending-json-sync store into the JSON textarea.
+ *
+ * Mutating callbacks only write the dumped payload to the store; copying
+ * it into the (potentially large) textarea is deferred for 500 ms so a
+ * burst of edits causes a single DOM update. Superseded timers resolve
+ * with no_update so Dash never waits on a stale promise.
+ */
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+  sync: {
+    jsonInput: function (dumped) {
+      if (dumped == null) {
+        return window.dash_clientside.no_update;
+      }
+      return new Promise(function (resolve) {
+        if (window._pendingJsonSyncResolve) {
+          window._pendingJsonSyncResolve(window.dash_clientside.no_update);
+        }
+        window._pendingJsonSyncResolve = resolve;
+        setTimeout(function () {
+          if (window._pendingJsonSyncResolve === resolve) {
+            window._pendingJsonSyncResolve = null;
+            resolve(dumped);
+          }
+        }, 500);
+      });
+    },
+  },
+});
@@ -0,0 +1,97 @@
+/* Clientside OCR overlay renderer.
+ *
+ * Builds the page/overlay tree in the browser from the raw stores
+ * (ocr-pdf-pages + ocr-items), so the server never constructs or
+ * serializes thousands of Div components for large OCR files. Static
+ * styling lives in ocr.css; only per-box geometry is set inline.
+ */
+
+function ocrEl(type, props, children) {
+  props = props || {};
+  if (children !== undefined) {
+    props.children = children;
+  }
+  return { type: type, namespace: "dash_html_components", props: props };
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+  ocr: {
+    render: function (pages, items) {
+      if (pages == null && items == null) {
+        return [[], "Upload a PDF and OCR JSON to see overlays."];
+      }
+      if (!pages || !pages.length) {
+        return [[], "Waiting for PDF..."];
+      }
+      if (items == null) {
+        return [[], "Waiting for OCR JSON..."];
+      }
+      if (!items.length) {
+        return [[], "OCR JSON loaded but empty (no detected text boxes)."];
+      }
+
+      var MAX_WIDTH = 1000;
+      var grouped = {};
+      for (var i = 0; i < items.length; i++) {
+        var pageNo = parseInt(items[i].page || 1, 10);
+        (grouped[pageNo] = grouped[pageNo] || []).push(items[i]);
+      }
+
+      var rendered = pages.map(function (page) {
+        var pdfW = page.pdf_width || 1;
+        var pdfH = page.pdf_height || 1;
+        var zoom = page.zoom || 1.0;
+        var imgW = pdfW * zoom;
+        var scale = imgW ? Math.min(1.0, MAX_WIDTH / imgW) : 1.0;
+        var displayW = imgW * scale;
+        var displayH = pdfH * zoom * scale;
+        var factor = zoom * scale;
+
+        var overlays = (grouped[page.page] || []).map(function (item, idx) {
+          var text = item.text || "";
+          var label = ocrEl("Div", { className: "ocr-box-label" }, text);
+          return ocrEl(
+            "Div",
+            {
+              key: "ocr-box-" + page.page + "-" + idx,
+              title: text,
+              className: "ocr-box",
+              style: {
+                left: item.x0 * factor + "px",
+                top: item.y0 * factor + "px",
+                width: (item.x1 - item.x0) * factor + "px",
+                height: (item.y1 - item.y0) * factor + "px",
+              },
+            },
+            [label]
+          );
+        });
+
+        return ocrEl(
+          "Div",
+          { className: "ocr-page" },
+          [
+            ocrEl("Div", { className: "ocr-page-title" }, "Page " + page.page),
+            ocrEl(
+              "Div",
+              {
+                className: "ocr-page-canvas",
+                style: { width: displayW + "px", height: displayH + "px" },
+              },
+              [
+                ocrEl("Img", {
+                  src: page.image,
+                  className: "ocr-page-img",
+                  style: { width: displayW + "px", height: displayH + "px" },
+                }),
+                ocrEl("Div", { className: "ocr-overlays" }, overlays),
+              ]
+            ),
+          ]
+        );
+      });
+
+      return [rendered, ""];
+    },
+  },
+});
@@ -1,5 +1,8 @@
+import asyncio
 import base64
-import copy
+import functools
+import hashlib
+import heapq
 import io
 import json
 import random
@@ -7,20 +10,62 @@ import re
 import shutil
 import tempfile
 import threading
+import time
 import traceback
 import uuid
 import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List
-
-from dash import ALL, Input, Output, State, callback_context, dcc, html, no_update
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Union
+
+try:  # Optional accelerator; stdlib json stays as the fallback.
+    import orjson
+except ImportError:
+    orjson = None
+
+try:  # Optional; plotly serializes numpy arrays much faster than nested lists.
+    import numpy as np
+except ImportError:
+    np = None
+
+try:  # PyMuPDF; resolved once here instead of on every PDF upload.
+    import fitz
+except Exception:  # noqa: BLE001
+    fitz = None
+
+try:  # Optional SIMD base64 decoder; big PDF uploads benefit most.
+    from pybase64 import b64decode as _b64decode
+except ImportError:
+    from base64 import b64decode as _b64decode
+
+try:  # Optional SIMD parser; its lazy proxies skip unused keys entirely.
+    import simdjson
+
+    _JSON_OBJ_TYPES = (dict, simdjson.Object)
+    _JSON_ARR_TYPES = (list, simdjson.Array)
+except ImportError:
+    simdjson = None
+    _JSON_OBJ_TYPES = (dict,)
+    _JSON_ARR_TYPES = (list,)
+
+import flask
+
+from dash import ALL, ClientsideFunction, Input, Output, State, callback_context, dcc, html, no_update
 from dash.exceptions import PreventUpdate
 import plotly.graph_objects as go
 import plotly.io as pio
 
+if orjson is not None:
+    # Figure serialization (to_html/to_json) goes through this engine; the
+    # orjson path encodes the big heatmap payloads several times faster.
+    pio.json.config.default_engine = "orjson"
+
 from invoice_app.render import build_html_export, render_invoice
 import invoice_app.evaluation as evaluation
+import invoice_app.schemas as schemas
 from invoice_app.utils import (
     decode_uploaded_text,
     dotted_get,
@@ -39,41 +84,147 @@ import pathlib
 
 SAMPLE_PATH = Path(__file__).parent / "templates" / "sample_invoice.json"
 
+# Precompiled patterns for the LLM-output salvage path.
+_RE_FENCE = re.compile(r"^```[a-zA-Z0-9]*", re.ASCII)
+_RE_ARR = re.compile(r"\[.*\]", re.DOTALL)
+_RE_OBJ = re.compile(r"\{.*\}", re.DOTALL)
+_RE_BRACKET = re.compile(r"[\[{]")
+_SEP_RE = re.compile(r"[,\n;]+")
+
 
 def _status(message: str, tone: str = "info") -> html.Div:
     return html.Div(message, className=f"pill {tone}")
 
 
+_SAMPLE_CACHE: tuple = None  # (st_mtime_ns, text)
+
+
 def _load_sample_text() -> str:
-    if SAMPLE_PATH.exists():
-        return SAMPLE_PATH.read_text(encoding="utf-8")
-    return ""
+    global _SAMPLE_CACHE
+    try:
+        mtime = SAMPLE_PATH.stat().st_mtime_ns
+    except OSError:
+        return ""
+    if _SAMPLE_CACHE is not None and _SAMPLE_CACHE[0] == mtime:
+        return _SAMPLE_CACHE[1]
+    text = SAMPLE_PATH.read_text(encoding="utf-8")
+    _SAMPLE_CACHE = (mtime, text)
+    return text
 
 
-def _dump(payload: Dict[str, Any]) -> str:
-    return json.dumps(payload, indent=2, ensure_ascii=False)
+_DUMP_MEMO: tuple = (None, "")
 
 
-def _update_field_label(template: Dict[str, Any], path: str, new_label: str) -> None:
-    target = path.replace(".label", "")
+def _dump(payload: Dict[str, Any]) -> str:
+    global _DUMP_MEMO
+    # Callbacks often re-dump the object they just received; the memo keeps a
+    # reference to the last payload, so the identity check is safe.
+    memo_payload, memo_text = _DUMP_MEMO
+    if memo_payload is payload:
+        return memo_text
+    if orjson is not None:
+        text = orjson.dumps(payload, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+    else:
+        text = json.dumps(payload, indent=2, ensure_ascii=False)
+    _DUMP_MEMO = (payload, text)
+    return text
+
+
+def _loads(text) -> Any:
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def _clone(value: Any) -> Any:
+    """Deep copy for JSON-shaped values; a serialize round-trip beats copy.deepcopy."""
+    if orjson is not None:
+        return orjson.loads(orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS))
+    return json.loads(json.dumps(value))
+
+
+def _payload_key(payload: Dict[str, Any]) -> bytes:
+    """Stable content hash of a payload, for memoizing expensive exports."""
+    if orjson is not None:
+        blob = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    else:
+        blob = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.blake2b(blob, digest_size=16).digest()
+
+
+_EXPORT_CACHE: Dict[tuple, Any] = {}
+
+
+def _export_cached(kind: str, key: bytes, build) -> Any:
+    """Memoize build() output under (kind, payload hash), keeping a small LRU."""
+    cache_key = (kind, key)
+    if cache_key in _EXPORT_CACHE:
+        return _EXPORT_CACHE[cache_key]
+    value = build()
+    if len(_EXPORT_CACHE) >= 16:
+        _EXPORT_CACHE.pop(next(iter(_EXPORT_CACHE)))
+    _EXPORT_CACHE[cache_key] = value
+    return value
+
+
+def _build_label_index(template: Dict[str, Any]) -> Dict[str, List[tuple]]:
+    """Map value paths / labels to the field dicts that carry them.
+
+    One linear pass over the template replaces the nested section scans in
+    _update_field_label and populate_selected; each entry records how the
+    key matched so callers can keep the original matching semantics.
+    """
+    index: Dict[str, List[tuple]] = {}
+
+    def _add(key: Any, ref: Dict[str, Any], how: str) -> None:
+        if key:
+            index.setdefault(str(key), []).append((ref, how))
+
     for section in template.get("sections", []) or []:
         stype = section.get("type", "grid")
         if stype == "grid":
             for field in section.get("fields", []) or []:
-                if field.get("value_path") == target or (not field.get("value_path") and field.get("label") == target):
-                    field["label"] = new_label
-        if stype == "panels":
+                _add(field.get("value_path"), field, "value_path")
+                _add(field.get("label"), field, "label")
+        elif stype == "panels":
             for panel in section.get("panels", []) or []:
                 for field in panel.get("fields", []) or []:
-                    if field.get("value_path") == target or (not field.get("value_path") and field.get("label") == target):
-                        field["label"] = new_label
-        if stype == "table":
+                    _add(field.get("value_path"), field, "value_path")
+                    _add(field.get("label"), field, "label")
+        elif stype == "table":
             for col in section.get("columns", []) or []:
-                if col.get("label") == target or col.get("key") == target:
-                    col["label"] = new_label
+                _add(col.get("label"), col, "table")
+                _add(col.get("key"), col, "table")
             for total in section.get("totals", []) or []:
-                if total.get("label") == target:
-                    total["label"] = new_label
+                _add(total.get("label"), total, "table")
+    return index
+
+
+_LABEL_INDEX_CACHE: Dict[int, tuple] = {}
+
+
+def _label_index(template: Dict[str, Any]) -> Dict[str, List[tuple]]:
+    """Return a cached label index for this template object."""
+    key = id(template)
+    cached = _LABEL_INDEX_CACHE.get(key)
+    if cached is not None and cached[0] is template:
+        return cached[1]
+    index = _build_label_index(template)
+    if len(_LABEL_INDEX_CACHE) >= 8:
+        _LABEL_INDEX_CACHE.clear()
+    # Keep a reference to the template so its id stays valid while cached.
+    _LABEL_INDEX_CACHE[key] = (template, index)
+    return index
+
+
+def _update_field_label(template: Dict[str, Any], path: str, new_label: str) -> None:
+    target = path.replace(".label", "")
+    for ref, how in _label_index(template).get(target, ()):
+        if how == "value_path" or how == "table" or not ref.get("value_path"):
+            ref["label"] = new_label
+            # Stop at the first hit; renaming every field that happens to
+            # share a path was never intended.
+            return
 
 
 def _update_style(template: Dict[str, Any], path: str, style_updates: Dict[str, Any]) -> None:
@@ -84,10 +235,14 @@ def _update_style(template: Dict[str, Any], path: str, style_updates: Dict[str,
 
 
 def _decode_upload_bytes(contents: str) -> bytes:
-    if not contents or "," not in contents:
+    if not contents:
         return b""
-    _header, encoded = contents.split(",", 1)
-    return base64.b64decode(encoded)
+    # Slice past the data-URI header instead of split(), which would copy
+    # the (possibly MB-sized) encoded body into a second string.
+    comma = contents.find(",")
+    if comma < 0:
+        return b""
+    return _b64decode(contents[comma + 1 :])
 
 
 def _decode_upload_text(contents: str) -> str:
@@ -95,59 +250,79 @@ def _decode_upload_text(contents: str) -> str:
 
 
 def _pdf_to_images(pdf_bytes: bytes, zoom: float = 1.5) -> List[Dict[str, Any]]:
-    try:
-        import fitz  # PyMuPDF
-    except Exception as exc:  # noqa: BLE001
-        raise RuntimeError("PyMuPDF (pymupdf) is required for PDF rendering.") from exc
+    if fitz is None:
+        raise RuntimeError("PyMuPDF (pymupdf) is required for PDF rendering.")
 
     doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-    pages: List[Dict[str, Any]] = []
-    for idx, page in enumerate(doc):
-        matrix = fitz.Matrix(zoom, zoom)
+    matrix = fitz.Matrix(zoom, zoom)
+
+    def _render_page(idx: int) -> Dict[str, Any]:
+        page = doc.load_page(idx)
+        # Rasterize + JPEG encode release the GIL, so pages render in parallel;
+        # JPEG keeps the base64 payload several times smaller than PNG.
         pix = page.get_pixmap(matrix=matrix, alpha=False)
-        img_b64 = base64.b64encode(pix.tobytes("png")).decode("ascii")
-        pages.append(
-            {
-                "page": idx + 1,
-                "pdf_width": float(page.rect.width),
-                "pdf_height": float(page.rect.height),
-                "zoom": zoom,
-                "img_width": pix.width,
-                "img_height": pix.height,
-                "image": f"data:image/png;base64,{img_b64}",
-            }
-        )
-    doc.close()
+        img_b64 = base64.b64encode(pix.tobytes("jpeg", jpg_quality=80)).decode("ascii")
+        return {
+            "page": idx + 1,
+            "pdf_width": float(page.rect.width),
+            "pdf_height": float(page.rect.height),
+            "zoom": zoom,
+            "img_width": pix.width,
+            "img_height": pix.height,
+            "image": f"data:image/jpeg;base64,{img_b64}",
+        }
+
+    try:
+        if doc.page_count > 1:
+            with ThreadPoolExecutor(max_workers=min(doc.page_count, os.cpu_count() or 4)) as pool:
+                pages = list(pool.map(_render_page, range(doc.page_count)))
+        else:
+            pages = [_render_page(idx) for idx in range(doc.page_count)]
+    finally:
+        doc.close()
     return pages
 
 
-def _parse_ocr_items(text: str) -> List[Dict[str, Any]]:
-    data = json.loads(text)
+def _parse_ocr_items(raw: Union[str, bytes]) -> List[Dict[str, Any]]:
+    # Well-formed documents take the typed msgspec path; anything it cannot
+    # handle (nested wrappers, stringified items) falls through to the
+    # lenient parser below.
+    typed = schemas.decode_ocr_items(raw)
+    if typed is not None:
+        return typed
+    if simdjson is not None and isinstance(raw, (bytes, bytearray)):
+        # Fresh parser per call: Parser is not thread-safe across Dash's
+        # Flask worker threads, and each parse() invalidates the proxies
+        # handed out by the previous one. Construction is cheap next to
+        # parsing a large upload.
+        data = simdjson.Parser().parse(raw)
+    else:
+        data = _loads(raw)
     items_raw = None
-    if isinstance(data, dict):
+    if isinstance(data, _JSON_OBJ_TYPES):
         items_raw = data.get("items")
-        if items_raw is None and isinstance(data.get("ocr"), dict):
+        if items_raw is None and isinstance(data.get("ocr"), _JSON_OBJ_TYPES):
             items_raw = data["ocr"].get("items")
-    elif isinstance(data, list):
+    elif isinstance(data, _JSON_ARR_TYPES):
         items_raw = data
 
     if isinstance(items_raw, str):
         try:
-            parsed = json.loads(items_raw)
+            parsed = _loads(items_raw)
             items_raw = parsed
         except Exception:
             items_raw = None
 
     if items_raw is None:
         raise ValueError("OCR JSON should be an array or an object with an 'items' array.")
-    if not isinstance(items_raw, list):
+    if not isinstance(items_raw, _JSON_ARR_TYPES):
         raise ValueError("OCR JSON 'items' must be an array.")
-    if not items_raw:
+    if not len(items_raw):
         return []
 
     items: List[Dict[str, Any]] = []
     for item in items_raw:
-        if not isinstance(item, dict):
+        if not isinstance(item, _JSON_OBJ_TYPES):
             continue
         try:
             page = int(item.get("page", 1))
@@ -172,83 +347,263 @@ def _parse_ocr_items(text: str) -> List[Dict[str, Any]]:
     return items
 
 
-def _render_ocr_page(page: Dict[str, Any], page_items: List[Dict[str, Any]], max_width: int = 1000) -> html.Div:
-    pdf_w = page.get("pdf_width") or 1
-    pdf_h = page.get("pdf_height") or 1
-    zoom = page.get("zoom") or 1.0
-    img_w = pdf_w * zoom
-    scale = min(1.0, max_width / img_w) if img_w else 1.0
-    display_w = img_w * scale
-    display_h = pdf_h * zoom * scale
-
-    overlays: List[html.Div] = []
-    for idx, item in enumerate(page_items):
-        left = item["x0"] * zoom * scale
-        top = item["y0"] * zoom * scale
-        width = (item["x1"] - item["x0"]) * zoom * scale
-        height = (item["y1"] - item["y0"]) * zoom * scale
-        overlays.append(
-            html.Div(
-                [
-                    html.Div(
-                        item.get("text", ""),
-                        style={
-                            "fontSize": "10px",
-                            "background": "rgba(255, 255, 255, 0.8)",
-                            "padding": "1px 3px",
-                            "borderRadius": "3px",
-                            "position": "absolute",
-                            "top": "-14px",
-                            "left": "0",
-                            "whiteSpace": "nowrap",
-                            "overflow": "hidden",
-                            "textOverflow": "ellipsis",
-                            "maxWidth": "150px",
-                        },
-                    )
-                ],
-                key=f"ocr-box-{page.get('page')}-{idx}",
-                style={
-                    "position": "absolute",
-                    "left": f"{left}px",
-                    "top": f"{top}px",
-                    "width": f"{width}px",
-                    "height": f"{height}px",
-                    "border": "2px solid rgba(220, 38, 38, 0.8)",
-                    "background": "rgba(239, 68, 68, 0.15)",
-                    "boxSizing": "border-box",
-                },
-                title=item.get("text", ""),
-            )
-        )
 
-    return html.Div(
-        [
-            html.Div(f"Page {page.get('page')}", style={"marginBottom": "6px", "fontWeight": "600"}),
-            html.Div(
-                [
-                    html.Img(
-                        src=page["image"],
-                        style={
-                            "width": f"{display_w}px",
-                            "height": f"{display_h}px",
-                            "display": "block",
-                        },
-                    ),
-                    html.Div(overlays, style={"position": "absolute", "left": 0, "top": 0}),
-                ],
-                style={
-                    "position": "relative",
-                    "width": f"{display_w}px",
-                    "height": f"{display_h}px",
-                    "border": "1px solid #ccc",
-                    "overflow": "hidden",
-                    "background": "#fff",
-                },
-            ),
-        ],
-        style={"marginBottom": "24px"},
+
+# Render workers are processes: HTML templating, wkhtmltopdf and OCR are
+# CPU-bound and would otherwise serialize behind the GIL. The pool is
+# created lazily so gunicorn workers that never generate datasets don't
+# fork idle processes.
+# Small shared pool for file writes so disk latency stays off the
+# event-loop/render hot paths; writers overlap instead of serializing.
+_IO_POOL = None
+_IO_POOL_LOCK = threading.Lock()
+
+
+def _get_io_pool() -> ThreadPoolExecutor:
+    global _IO_POOL
+    with _IO_POOL_LOCK:
+        if _IO_POOL is None:
+            _IO_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="ds-io")
+        return _IO_POOL
+
+
+_RENDER_POOL = None
+_RENDER_POOL_LOCK = threading.Lock()
+
+
+def _get_render_pool() -> ProcessPoolExecutor:
+    global _RENDER_POOL
+    with _RENDER_POOL_LOCK:
+        if _RENDER_POOL is None:
+            _RENDER_POOL = ProcessPoolExecutor(max_workers=max(2, (os.cpu_count() or 2) - 1))
+        return _RENDER_POOL
+
+
+def _render_and_save(payload: Dict[str, Any], target_dir_str: str, sample_idx: int) -> str:
+    """Render one payload to HTML/PDF/OCR files; runs in a worker process."""
+    target_dir = Path(target_dir_str)
+    html_str = build_html_export(payload)
+    pdf_bytes = html_to_pdf_bytes(
+        html_str, orientation=payload.get("template", {}).get("page", {}).get("orientation", "portrait")
     )
+    ocr_json = build_ocr_ground_truth(pdf_bytes, require_items=True)
+    base_name = f"sample_{sample_idx:03d}_{uuid.uuid4().hex[:6]}"
+    payload_text = _dump(payload)
+    # Plain sequential writes: the process pool already overlaps whole
+    # renders, and a forked worker must not touch the parent's _IO_POOL —
+    # its threads do not survive fork, so submitted work would never run.
+    (target_dir / f"{base_name}.json").write_text(payload_text, encoding="utf-8")
+    (target_dir / f"{base_name}.pdf").write_bytes(pdf_bytes)
+    (target_dir / f"{base_name}.ocr.json").write_bytes(ocr_json)
+    return payload_text
+
+def _extract_text_cached(cache_dir, src: str, pdf_path, extractor) -> str:
+    """Persist extracted text per (engine, pdf bytes) across eval runs.
+
+    OCR dominates eval wall time and is deterministic per PDF, so
+    re-running with different method/model combos should not re-OCR.
+    """
+    if cache_dir is None:
+        return extractor(pdf_path)
+    digest = hashlib.sha1(Path(pdf_path).read_bytes()).hexdigest()
+    cache_file = cache_dir / f"{src}_{digest}.txt"
+    try:
+        return cache_file.read_text(encoding="utf-8")
+    except OSError:
+        pass
+    text = extractor(pdf_path)
+    try:
+        cache_file.write_text(text, encoding="utf-8")
+    except OSError:
+        pass
+    return text
+
+
+def _ocr_dispatch(src: str, pdf_path, cache_dir) -> str:
+    """OCR one PDF with the named engine; top-level so process pools can pickle it."""
+    if src == "tesseract":
+        return _extract_text_cached(cache_dir, src, pdf_path, evaluation.extract_text_tesseract)
+    if src == "easyocr":
+        return _extract_text_cached(cache_dir, src, pdf_path, evaluation.extract_text_easyocr)
+    return ""
+
+
+# Shared placeholder; consumers never mutate empty figures and Dash only
+# serializes them, so one instance can stand in everywhere. Kept as a plain
+# dict so responses take the serializer's fast path (see _build_eval_figures).
+_EMPTY_GO_FIG = go.Figure().to_plotly_json()
+
+# Progress ticks only touch status/progress/runtime-errors; the remaining
+# eight outputs always stay put, so the tail is shared as one tuple instead
+# of rebuilt element by element on every interval.
+_NO_UPDATE_TAIL = (no_update,) * 8
+
+
+@dataclass(slots=True)
+class _EvalJob:
+    """Mutable status of one evaluation run; slots avoid a per-update dict."""
+
+    done: bool = False
+    errors: List[str] = field(default_factory=list)
+    done_steps: int = 0
+    total_steps: int = 1
+    current_method: str = ""
+    current_sample: str = ""
+    results: Dict[str, Any] = field(default_factory=dict)
+    summary: str = ""
+    errors_text: str = ""
+    plots_path: Optional[str] = None
+    results_path: Optional[str] = None
+
+
+def _worst_key(kv) -> float:
+    """Sort key for worst-field reporting; missing rates count as perfect."""
+    rate = kv[1].get("normalized_rate")
+    return 1.0 if rate is None else rate
+
+
+def _error_report(message: str, exc: Exception) -> str:
+    """Error-file body: expected failures carry a self-contained message;
+    a full stack walk/format is only paid for unexpected exception types."""
+    if isinstance(exc, (RuntimeError, ValueError)):
+        return message
+    return f"{message}\n\n{traceback.format_exc()}"
+
+
+@functools.lru_cache(maxsize=256)
+def _normalize_page_range(pages_min, pages_max):
+    try:
+        min_pages = int(pages_min) if pages_min is not None else 1
+    except Exception:
+        min_pages = 1
+    try:
+        max_pages = int(pages_max) if pages_max is not None else min_pages
+    except Exception:
+        max_pages = min_pages
+    if min_pages < 1:
+        min_pages = 1
+    if max_pages < min_pages:
+        max_pages = min_pages
+    return min_pages, max_pages
+
+
+@functools.lru_cache(maxsize=256)
+def _build_page_targets(sample_count, pages_min, pages_max):
+    count = max(1, int(sample_count or 1))
+    min_pages, max_pages = _normalize_page_range(pages_min, pages_max)
+    span = max_pages - min_pages + 1
+    base = count // span
+    remainder = count % span
+    targets = []
+    for offset in range(span):
+        reps = base + (1 if offset < remainder else 0)
+        targets.extend([min_pages + offset] * reps)
+    # Tuple so the cached value cannot be mutated by a caller.
+    return tuple(targets)
+
+
+# Static schema block of the dataset prompt; built once instead of being
+# re-concatenated on every prompt refresh.
+_PROMPT_SKELETON = (
+    "Generate a JSON OBJECT only (no prose) when one invoice sample is requested. "
+    "Return exactly one sample per request; the caller handles total sample counts. "
+    "The top-level keys 'template' and 'data' must be JSON objects, not strings. "
+    "Each element must be an object: {\n"
+    '  "template": {\n'
+    '    "title": string,\n'
+    '    "label": string,\n'
+    '    "currency": string,\n'
+    '    "accent_color": hex,\n'
+    '    "security": { "options": [strings], "watermark": string },\n'
+    '    "page": { "width": "900px", "height": "auto", "padding": "32px", "background_color": hex, "background_image": "", "border_radius": "18px", "orientation": "portrait|landscape" },\n'
+    '    "font": { "family": string, "color": hex, "size": number },\n'
+    '    "sections": [\n'
+    '      { "type": "grid", "title": string, "columns": 2, "fields": [ { "label": string, "value_path": dotted_path, "format": "currency"|null, "placeholder": string|null } ] },\n'
+    '      { "type": "table", "title": string, "data_path": "items", "columns": [ { "label": string, "key": string, "align": "left|center|right", "format": "currency"|null } ], "totals": [ { "label": string, "value_path": dotted_path, "format": "currency"|null } ] },\n'
+    '      { "type": "panels", "title": string, "panels": [ { "heading": string, "fields": [ { "label": string, "value_path": dotted_path } ] } ] },\n'
+    '      { "type": "notes", "title": string, "value_path": string }\n'
+    "    ]\n"
+    "  },\n"
+    '  "data": {\n'
+    '    "invoice": { "number": string, "date": iso-date, "due_date": iso-date, "reference": string },\n'
+    '    "seller": { "name": string, "contact": string, "email": string, "address": string },\n'
+    '    "client": { "name": string, "contact": string, "email": string, "address": string },\n'
+    '    "items": [ { "description": string, "qty": number, "unit_price": number, "line_total": number } ],\n'
+    '    "totals": { "subtotal": number, "tax": number, "due": number },\n'
+    '    "payment": { "bank": string, "iban": string, "reference": string },\n'
+    '    "notes": string\n'
+    "  }\n"
+    "}. "
+    "Totals must match items. Provide varied but realistic content. "
+)
+
+
+@functools.lru_cache(maxsize=128)
+def _prompt_text_cached(
+    variability,
+    pages_min,
+    pages_max,
+    lang_text,
+    font_text,
+    color_text,
+    size_min,
+    size_max,
+    aug_text,
+    difficulty,
+):
+    return (
+        _PROMPT_SKELETON
+        + f"Max variability target {variability}/10: mix {pages_min}-{pages_max} pages by varying item counts (5-50), long/short notes, optional extra rows; shuffle section order; sometimes omit sections (e.g., notes/panels); vary spacing. "
+        "Randomize logos/backgrounds with real URLs (e.g., https://picsum.photos/240/80 logos, https://picsum.photos/1200/800 backgrounds), and vary logo placement/size (top-left/right/center, large/small). "
+        "Vary page orientation (portrait/landscape), widths/padding, and section titles. "
+        "Allow missing/blank fields occasionally. "
+        + f"Use languages from: {lang_text}. When a prompt specifies 'Target language: <lang>', use only that language in labels and values. "
+        + f"Target page count range: {pages_min}-{pages_max}. When a prompt specifies 'Target pages: X', adjust content to reach about X pages. "
+        "Use fonts that support these scripts (e.g., Noto Sans/Serif SC/JP/KR for CJK, Inter/Manrope/etc. for Latin). "
+        + f"Allowed font families: {font_text}. "
+        + f"Text colors palette: {color_text}. "
+        + f"Text size range: {size_min}-{size_max}px. "
+        + f"Augmentations to apply later: {aug_text}. "
+        + f"Difficulty target {difficulty}/10; mix easy/hard evenly (balanced set). "
+        "Reply ONLY with the JSON array, no code fences or explanations."
+    )
+
+
+def _build_prompt_text(
+    fonts,
+    colors,
+    augmentations,
+    difficulty,
+    variability,
+    size_min,
+    size_max,
+    sample_count,
+    languages,
+    pages_min,
+    pages_max,
+):
+    size_min = size_min or 12
+    size_max = size_max or 18
+    difficulty = difficulty or 5
+    variability = variability or 5
+    pages_min, pages_max = _normalize_page_range(pages_min, pages_max)
+    aug_text = ", ".join(augmentations) if augmentations else "none"
+    font_text = ", ".join(fonts) if fonts else "any"
+    color_text = ", ".join(colors) if colors else "any"
+    lang_text = ", ".join(languages) if languages else "any language"
+    return _prompt_text_cached(
+        variability,
+        pages_min,
+        pages_max,
+        lang_text,
+        font_text,
+        color_text,
+        size_min,
+        size_max,
+        aug_text,
+        difficulty,
+    )
+
 
 def register_callbacks(app):
     @app.callback(
@@ -302,9 +657,10 @@ def register_callbacks(app):
             },
             "n_clicks",
         ),
+        State("selection-store", "data"),
         prevent_initial_call=True,
     )
-    def select_field(clicks):
+    def select_field(clicks, prev_selection):
         ctx = callback_context
         if not ctx.triggered:
             raise PreventUpdate
@@ -313,6 +669,10 @@ def register_callbacks(app):
             raise PreventUpdate
         # trig_id is a dict with "type" and "path"
         if isinstance(trig_id, dict):
+            if trig_id == prev_selection:
+                # Re-clicking the selected field would only re-trigger
+                # populate_selected for an identical result.
+                raise PreventUpdate
             return trig_id
         raise PreventUpdate
 
@@ -355,17 +715,9 @@ def register_callbacks(app):
                     text_value = ""
             else:
                 target = path.replace(".label", "")
-                for section in template.get("sections", []) or []:
-                    stype = section.get("type", "grid")
-                    if stype == "grid":
-                        for f in section.get("fields", []) or []:
-                            if f.get("value_path") == target or f.get("label") == target:
-                                text_value = f.get("label", "")
-                    if stype == "panels":
-                        for panel in section.get("panels", []) or []:
-                            for f in panel.get("fields", []) or []:
-                                if f.get("value_path") == target or f.get("label") == target:
-                                    text_value = f.get("label", "")
+                for ref, how in _label_index(template).get(target, ()):
+                    if how in ("value_path", "label"):
+                        text_value = ref.get("label", "")
         else:
             text_value = dotted_get(data, path, "")
 
@@ -400,7 +752,8 @@ def register_callbacks(app):
     def download_invoice(_n_clicks: int, payload: Dict[str, Any]):
         if not payload:
             raise PreventUpdate
-        html_str = build_html_export(payload)
+        key = _payload_key(payload)
+        html_str = _export_cached("html", key, lambda: build_html_export(payload))
         base_name = dotted_get(payload.get("data", {}), "invoice.number", "invoice") if isinstance(payload, dict) else "invoice"
         base_name = str(base_name).replace(" ", "_")
         return dcc.send_string(html_str, filename=f"{base_name}.html")
@@ -416,7 +769,8 @@ def register_callbacks(app):
     def download_pdf(_n_clicks: int, payload: Dict[str, Any]):
         if not payload:
             return no_update, no_update, _status("Generate a preview first, then download.", "warning")
-        html_str = build_html_export(payload)
+        key = _payload_key(payload)
+        html_str = _export_cached("html", key, lambda: build_html_export(payload))
         orientation = (
             payload.get("template", {}).get("page", {}).get("orientation", "portrait")
             if isinstance(payload, dict)
@@ -425,13 +779,15 @@ def register_callbacks(app):
         base_name = dotted_get(payload.get("data", {}), "invoice.number", "invoice") if isinstance(payload, dict) else "invoice"
         base_name = str(base_name).replace(" ", "_")
         try:
-            pdf_bytes = html_to_pdf_bytes(html_str, orientation=orientation)
+            pdf_bytes = _export_cached(
+                f"pdf:{orientation}", key, lambda: html_to_pdf_bytes(html_str, orientation=orientation)
+            )
         except Exception as exc:  # noqa: BLE001
             return no_update, no_update, _status(str(exc), "danger")
 
-        ocr_json = None
+        ocr_bytes = None
         try:
-            ocr_json = build_ocr_ground_truth(pdf_bytes)
+            ocr_bytes = _export_cached("ocr", key, lambda: build_ocr_ground_truth(pdf_bytes))
         except Exception as exc:  # noqa: BLE001
             # Keep PDF download, but inform about OCR failure
             return (
@@ -442,13 +798,23 @@ def register_callbacks(app):
 
         return (
             dcc.send_bytes(pdf_bytes, f"{base_name}.pdf"),
-            dcc.send_string(ocr_json, f"{base_name}.json"),
+            dcc.send_bytes(ocr_bytes, f"{base_name}.json"),
             _status("PDF and OCR JSON generated.", "success"),
         )
 
+    # Mutating callbacks park the dumped payload in pending-json-sync; the
+    # browser copies it into the textarea after a debounce (assets/json_sync.js)
+    # so a burst of edits re-diffs the large textarea only once.
+    app.clientside_callback(
+        ClientsideFunction(namespace="sync", function_name="jsonInput"),
+        Output("template-json-input", "value", allow_duplicate=True),
+        Input("pending-json-sync", "data"),
+        prevent_initial_call=True,
+    )
+
     @app.callback(
         Output("payload-store", "data", allow_duplicate=True),
-        Output("template-json-input", "value", allow_duplicate=True),
+        Output("pending-json-sync", "data", allow_duplicate=True),
         Output("feedback", "children", allow_duplicate=True),
         Input("apply-theme-btn", "n_clicks"),
         State("payload-store", "data"),
@@ -466,7 +832,8 @@ def register_callbacks(app):
     def apply_theme(_n, payload, family, size, font_color, accent, bg, bg_image, orientation, sec_opts, sec_watermark):
         if not payload:
             return no_update, no_update, _status("Load or preview JSON first.", "warning")
-        new_payload = copy.deepcopy(payload)
+        # Only the template changes here, so share the (possibly large) data subtree.
+        new_payload = {**payload, "template": _clone(payload.get("template") or {})}
         template = new_payload.setdefault("template", {})
         font_cfg = template.setdefault("font", {})
         if family:
@@ -495,18 +862,38 @@ def register_callbacks(app):
 
     @app.callback(
         Output("payload-store", "data", allow_duplicate=True),
-        Output("template-json-input", "value", allow_duplicate=True),
+        Output("pending-json-sync", "data", allow_duplicate=True),
         Output("feedback", "children", allow_duplicate=True),
         Input("update-text-btn", "n_clicks"),
+        Input("update-style-btn", "n_clicks"),
         State("selection-store", "data"),
         State("selected-text-input", "value"),
+        State("selected-text-color", "value"),
+        State("selected-text-size", "value"),
+        State("selected-text-weight", "value"),
         State("payload-store", "data"),
         prevent_initial_call=True,
     )
-    def update_text(_n, selection, text_value, payload):
+    def update_selected(_text_n, _style_n, selection, text_value, color, size, weight, payload):
+        # One callback for both edit buttons so a click clones the payload once
+        # instead of firing two separate callbacks through the Dash machinery.
+        triggered = callback_context.triggered_id
         if not payload or not selection or not selection.get("path"):
-            return no_update, no_update, _status("Click a field to edit its text.", "warning")
-        new_payload = copy.deepcopy(payload)
+            verb = "style" if triggered == "update-style-btn" else "text"
+            return no_update, no_update, _status(f"Click a field to edit its {verb}.", "warning")
+
+        if triggered == "update-style-btn":
+            # Style edits only touch the template, so the data subtree can be shared.
+            new_payload = {**payload, "template": _clone(payload.get("template") or {})}
+            style_updates = {
+                "color": color,
+                "fontSize": f"{size}px" if size else None,
+                "fontWeight": weight,
+            }
+            _update_style(new_payload.setdefault("template", {}), selection["path"], style_updates)
+            return new_payload, _dump(new_payload), _status("Style updated.", "success")
+
+        new_payload = _clone(payload)
         path = selection.get("path")
         role = selection.get("role")
         template = new_payload.setdefault("template", {})
@@ -533,31 +920,7 @@ def register_callbacks(app):
 
     @app.callback(
         Output("payload-store", "data", allow_duplicate=True),
-        Output("template-json-input", "value", allow_duplicate=True),
-        Output("feedback", "children", allow_duplicate=True),
-        Input("update-style-btn", "n_clicks"),
-        State("selection-store", "data"),
-        State("selected-text-color", "value"),
-        State("selected-text-size", "value"),
-        State("selected-text-weight", "value"),
-        State("payload-store", "data"),
-        prevent_initial_call=True,
-    )
-    def update_style(_n, selection, color, size, weight, payload):
-        if not payload or not selection or not selection.get("path"):
-            return no_update, no_update, _status("Click a field to edit its style.", "warning")
-        new_payload = copy.deepcopy(payload)
-        style_updates = {
-            "color": color,
-            "fontSize": f"{size}px" if size else None,
-            "fontWeight": weight,
-        }
-        _update_style(new_payload.setdefault("template", {}), selection["path"], style_updates)
-        return new_payload, _dump(new_payload), _status("Style updated.", "success")
-
-    @app.callback(
-        Output("payload-store", "data", allow_duplicate=True),
-        Output("template-json-input", "value", allow_duplicate=True),
+        Output("pending-json-sync", "data", allow_duplicate=True),
         Output("feedback", "children", allow_duplicate=True),
         Input("builder-add-section-btn", "n_clicks"),
         State("builder-section-type", "value"),
@@ -573,7 +936,7 @@ def register_callbacks(app):
     def add_section(_n, s_type, title, grid_cols, fields_text, table_path, table_cols, table_totals, payload):
         if not _n:
             raise PreventUpdate
-        new_payload = copy.deepcopy(payload) if payload else {"template": {"sections": [], "title": "Invoice"}, "data": {}}
+        new_payload = _clone(payload) if payload else {"template": {"sections": [], "title": "Invoice"}, "data": {}}
         template = new_payload.setdefault("template", {})
         sections = template.setdefault("sections", [])
 
@@ -622,7 +985,7 @@ def register_callbacks(app):
 
     @app.callback(
         Output("payload-store", "data", allow_duplicate=True),
-        Output("template-json-input", "value", allow_duplicate=True),
+        Output("pending-json-sync", "data", allow_duplicate=True),
         Output("feedback", "children", allow_duplicate=True),
         Input("section-move-up", "n_clicks"),
         Input("section-move-down", "n_clicks"),
@@ -637,7 +1000,8 @@ def register_callbacks(app):
         if not ctx.triggered:
             raise PreventUpdate
         direction = ctx.triggered_id
-        sections = copy.deepcopy(payload.get("template", {}).get("sections", []) or [])
+        # Reordering only swaps references, so a shallow copy of the list suffices.
+        sections = list(payload.get("template", {}).get("sections", []) or [])
         if not sections or selected_idx >= len(sections):
             raise PreventUpdate
         target_idx = selected_idx
@@ -650,8 +1014,7 @@ def register_callbacks(app):
         else:
             raise PreventUpdate
 
-        new_payload = copy.deepcopy(payload)
-        new_payload.setdefault("template", {})["sections"] = sections
+        new_payload = {**payload, "template": {**payload.get("template", {}), "sections": sections}}
         # Also keep dropdown selection in sync via allow_duplicate outputs
         return new_payload, _dump(new_payload), _status("Reordered sections.", "success")
 
@@ -684,8 +1047,7 @@ def register_callbacks(app):
         if not contents:
             raise PreventUpdate
         try:
-            text = _decode_upload_text(contents)
-            items = _parse_ocr_items(text)
+            items = _parse_ocr_items(_decode_upload_bytes(contents))
         except Exception as exc:  # noqa: BLE001
             return no_update, _status(f"OCR JSON error: {exc}", "danger")
         name = filename or "JSON"
@@ -697,134 +1059,18 @@ def register_callbacks(app):
             )
         return items, _status(f"Loaded {name} with {len(items)} boxes.", "success")
 
-    @app.callback(
+    # Overlay geometry is computed in the browser (assets/ocr.js); the server
+    # only ships raw page metadata and OCR items through the stores.
+    app.clientside_callback(
+        ClientsideFunction(namespace="ocr", function_name="render"),
         Output("ocr-viewer", "children"),
         Output("ocr-viewer-placeholder", "children"),
         Input("ocr-pdf-pages", "data"),
         Input("ocr-items", "data"),
     )
-    def render_ocr_viewer(pages, items):
-        if pages is None and items is None:
-            return [], "Upload a PDF and OCR JSON to see overlays."
-        if not pages:
-            return [], "Waiting for PDF..."
-        if items is None:
-            return [], "Waiting for OCR JSON..."
-        if items == []:
-            return [], "OCR JSON loaded but empty (no detected text boxes)."
-
-        grouped: Dict[int, List[Dict[str, Any]]] = {}
-        for item in items or []:
-            page_no = int(item.get("page", 1))
-            grouped.setdefault(page_no, []).append(item)
-
-        rendered = []
-        for page in pages or []:
-            page_no = page.get("page")
-            page_items = grouped.get(int(page_no), []) if page_no is not None else []
-            rendered.append(_render_ocr_page(page, page_items))
-        return rendered, ""
 
     # ---------- Dataset maker ----------
 
-    def _normalize_page_range(pages_min, pages_max):
-        try:
-            min_pages = int(pages_min) if pages_min is not None else 1
-        except Exception:
-            min_pages = 1
-        try:
-            max_pages = int(pages_max) if pages_max is not None else min_pages
-        except Exception:
-            max_pages = min_pages
-        if min_pages < 1:
-            min_pages = 1
-        if max_pages < min_pages:
-            max_pages = min_pages
-        return min_pages, max_pages
-
-    def _build_page_targets(sample_count, pages_min, pages_max):
-        count = max(1, int(sample_count or 1))
-        min_pages, max_pages = _normalize_page_range(pages_min, pages_max)
-        span = max_pages - min_pages + 1
-        base = count // span
-        remainder = count % span
-        targets = []
-        for offset in range(span):
-            reps = base + (1 if offset < remainder else 0)
-            targets.extend([min_pages + offset] * reps)
-        return targets
-
-    def _build_prompt_text(
-        fonts,
-        colors,
-        augmentations,
-        difficulty,
-        variability,
-        size_min,
-        size_max,
-        sample_count,
-        languages,
-        pages_min,
-        pages_max,
-    ):
-        fonts = fonts or []
-        colors = colors or []
-        augmentations = augmentations or []
-        size_min = size_min or 12
-        size_max = size_max or 18
-        difficulty = difficulty or 5
-        variability = variability or 5
-        pages_min, pages_max = _normalize_page_range(pages_min, pages_max)
-        aug_text = ", ".join(augmentations) if augmentations else "none"
-        font_text = ", ".join(fonts) if fonts else "any"
-        color_text = ", ".join(colors) if colors else "any"
-        lang_text = ", ".join(languages) if languages else "any language"
-        return (
-            "Generate a JSON OBJECT only (no prose) when one invoice sample is requested. "
-            "Return exactly one sample per request; the caller handles total sample counts. "
-            "The top-level keys 'template' and 'data' must be JSON objects, not strings. "
-            "Each element must be an object: {\n"
-            '  "template": {\n'
-            '    "title": string,\n'
-            '    "label": string,\n'
-            '    "currency": string,\n'
-            '    "accent_color": hex,\n'
-            '    "security": { "options": [strings], "watermark": string },\n'
-            '    "page": { "width": "900px", "height": "auto", "padding": "32px", "background_color": hex, "background_image": "", "border_radius": "18px", "orientation": "portrait|landscape" },\n'
-            '    "font": { "family": string, "color": hex, "size": number },\n'
-            '    "sections": [\n'
-            '      { "type": "grid", "title": string, "columns": 2, "fields": [ { "label": string, "value_path": dotted_path, "format": "currency"|null, "placeholder": string|null } ] },\n'
-            '      { "type": "table", "title": string, "data_path": "items", "columns": [ { "label": string, "key": string, "align": "left|center|right", "format": "currency"|null } ], "totals": [ { "label": string, "value_path": dotted_path, "format": "currency"|null } ] },\n'
-            '      { "type": "panels", "title": string, "panels": [ { "heading": string, "fields": [ { "label": string, "value_path": dotted_path } ] } ] },\n'
-            '      { "type": "notes", "title": string, "value_path": string }\n'
-            "    ]\n"
-            "  },\n"
-            '  "data": {\n'
-            '    "invoice": { "number": string, "date": iso-date, "due_date": iso-date, "reference": string },\n'
-            '    "seller": { "name": string, "contact": string, "email": string, "address": string },\n'
-            '    "client": { "name": string, "contact": string, "email": string, "address": string },\n'
-            '    "items": [ { "description": string, "qty": number, "unit_price": number, "line_total": number } ],\n'
-            '    "totals": { "subtotal": number, "tax": number, "due": number },\n'
-            '    "payment": { "bank": string, "iban": string, "reference": string },\n'
-            '    "notes": string\n'
-            "  }\n"
-            "}. "
-            "Totals must match items. Provide varied but realistic content. "
-            f"Max variability target {variability}/10: mix {pages_min}-{pages_max} pages by varying item counts (5-50), long/short notes, optional extra rows; shuffle section order; sometimes omit sections (e.g., notes/panels); vary spacing. "
-            "Randomize logos/backgrounds with real URLs (e.g., https://picsum.photos/240/80 logos, https://picsum.photos/1200/800 backgrounds), and vary logo placement/size (top-left/right/center, large/small). "
-            "Vary page orientation (portrait/landscape), widths/padding, and section titles. "
-            "Allow missing/blank fields occasionally. "
-            f"Use languages from: {lang_text}. When a prompt specifies 'Target language: <lang>', use only that language in labels and values. "
-            f"Target page count range: {pages_min}-{pages_max}. When a prompt specifies 'Target pages: X', adjust content to reach about X pages. "
-            "Use fonts that support these scripts (e.g., Noto Sans/Serif SC/JP/KR for CJK, Inter/Manrope/etc. for Latin). "
-            f"Allowed font families: {font_text}. "
-            f"Text colors palette: {color_text}. "
-            f"Text size range: {size_min}-{size_max}px. "
-            f"Augmentations to apply later: {aug_text}. "
-            f"Difficulty target {difficulty}/10; mix easy/hard evenly (balanced set). "
-            "Reply ONLY with the JSON array, no code fences or explanations."
-        )
-
     @app.callback(
         Output("ds-prompt", "value"),
         Input("ds-refresh-prompt", "n_clicks"),
@@ -919,25 +1165,32 @@ def register_callbacks(app):
             pages_max,
         )
 
-    def _call_openai(api_key: str, model: str, prompt: str, max_tokens: int = 1500):
+    def _make_async_openai_client(api_key: str):
+        # One client per job: keeps the httpx connection pool (TLS/DNS) warm
+        # across samples. Not cached across jobs — each job runs its own
+        # asyncio.run() loop, and a pooled connection bound to a closed loop
+        # would fail every request of the next job.
         try:
-            from openai import OpenAI  # type: ignore
+            from openai import AsyncOpenAI  # type: ignore
         except Exception as exc:  # noqa: BLE001
             raise RuntimeError("openai package not installed. Add it to requirements and pip install.") from exc
+        return AsyncOpenAI(api_key=api_key, max_retries=2)
+
+    # Constant across every call in a job; built once so each request only
+    # allocates the user message that actually varies.
+    _SYSTEM_MESSAGE = {
+        "role": "system",
+        "content": (
+            "You generate invoice datasets. Reply ONLY with a valid JSON object with keys "
+            "'template' and 'data'. Do not include any prose or code fences."
+        ),
+    }
 
-        client = OpenAI(api_key=api_key)
-        messages = [
-            {
-                "role": "system",
-                "content": (
-                    "You generate invoice datasets. Reply ONLY with a valid JSON object with keys "
-                    "'template' and 'data'. Do not include any prose or code fences."
-                ),
-            },
-            {"role": "user", "content": prompt},
-        ]
+    async def _call_openai_async(client, model: str, prompt: str, max_tokens: int = 1500):
+        messages = [_SYSTEM_MESSAGE, {"role": "user", "content": prompt}]
+        used_json_mode = True
         try:
-            resp = client.chat.completions.create(
+            resp = await client.chat.completions.create(
                 model=model,
                 messages=messages,
                 temperature=0.7,
@@ -947,8 +1200,9 @@ def register_callbacks(app):
         except Exception as exc:  # noqa: BLE001
             msg = str(exc)
             if "response_format" in msg or "json_object" in msg:
+                used_json_mode = False
                 try:
-                    resp = client.chat.completions.create(
+                    resp = await client.chat.completions.create(
                         model=model,
                         messages=messages,
                         temperature=0.7,
@@ -966,7 +1220,7 @@ def register_callbacks(app):
         prompt_tokens = getattr(usage, "prompt_tokens", None) if usage else None
         completion_tokens = getattr(usage, "completion_tokens", None) if usage else None
         print(f"[Dataset] OpenAI response received. Prompt tokens: {prompt_tokens}, Completion tokens: {completion_tokens}")
-        return content, prompt_tokens, completion_tokens
+        return content, prompt_tokens, completion_tokens, used_json_mode
 
     def _zip_dataset_folder(folder: Path) -> bytes:
         buffer = io.BytesIO()
@@ -999,13 +1253,18 @@ def register_callbacks(app):
             return entries[0]
         return dest
 
-    def _parse_llm_json(content: str):
-        """Robustly parse LLM output that should be a JSON array."""
+    def _parse_llm_json(content: str, lenient: bool = True):
+        """Robustly parse LLM output that should be a JSON array.
+
+        With lenient=False only the fence-strip plus one direct parse run;
+        a failure propagates instead of entering the regex/raw_decode
+        repair ladder, for callers that know the content is plain JSON.
+        """
         def _strip_code_fence(txt: str) -> str:
             txt = txt.strip()
             if txt.startswith("```"):
                 # remove leading ```json or ``` and trailing ```
-                txt = re.sub(r"^```[a-zA-Z0-9]*", "", txt).strip()
+                txt = _RE_FENCE.sub("", txt).strip()
                 if txt.endswith("```"):
                     txt = txt[: -3].strip()
             return txt
@@ -1013,16 +1272,17 @@ def register_callbacks(app):
         content = _strip_code_fence(content)
 
         try:
-            return json.loads(content)
+            return _loads(content)
         except Exception:
-            pass
+            if not lenient:
+                raise
 
         # Try first array block
-        match = re.search(r"\[.*\]", content, re.DOTALL)
+        match = _RE_ARR.search(content)
         if match:
             snippet = _strip_code_fence(match.group(0))
             try:
-                return json.loads(snippet)
+                return _loads(snippet)
             except Exception:
                 pass
 
@@ -1032,16 +1292,16 @@ def register_callbacks(app):
         if first != -1 and last != -1 and last > first:
             snippet = _strip_code_fence(content[first : last + 1])
             try:
-                return json.loads(snippet)
+                return _loads(snippet)
             except Exception:
                 pass
 
         # Try first object block
-        match = re.search(r"\{.*\}", content, re.DOTALL)
+        match = _RE_OBJ.search(content)
         if match:
             snippet = _strip_code_fence(match.group(0))
             try:
-                return json.loads(snippet)
+                return _loads(snippet)
             except Exception:
                 pass
 
@@ -1051,61 +1311,19 @@ def register_callbacks(app):
         if first != -1 and last != -1 and last > first:
             snippet = _strip_code_fence(content[first : last + 1])
             try:
-                return json.loads(snippet)
+                return _loads(snippet)
             except Exception:
                 pass
 
-        # Last resort: bracket-matching scan to extract top-level array
-        in_str = False
-        esc = False
-        depth = 0
-        start_idx = None
-        for i, ch in enumerate(content):
-            if ch == "\\" and not esc:
-                esc = True
-                continue
-            if ch in ("'", '"') and not esc:
-                in_str = not in_str
-            if not in_str:
-                if ch == "[":
-                    if depth == 0:
-                        start_idx = i
-                    depth += 1
-                elif ch == "]":
-                    depth -= 1
-                    if depth == 0 and start_idx is not None:
-                        snippet = content[start_idx : i + 1]
-                        try:
-                            return json.loads(_strip_code_fence(snippet))
-                        except Exception:
-                            pass
-            esc = False
-
-        # Last resort: bracket-matching scan to extract top-level object
-        in_str = False
-        esc = False
-        depth = 0
-        start_idx = None
-        for i, ch in enumerate(content):
-            if ch == "\\" and not esc:
-                esc = True
+        # Last resort: let the C decoder find a valid value starting at each
+        # bracket instead of scanning characters in Python.
+        decoder = json.JSONDecoder()
+        for match in _RE_BRACKET.finditer(content):
+            try:
+                obj, _ = decoder.raw_decode(content, match.start())
+                return obj
+            except ValueError:
                 continue
-            if ch in ("'", '"') and not esc:
-                in_str = not in_str
-            if not in_str:
-                if ch == "{":
-                    if depth == 0:
-                        start_idx = i
-                    depth += 1
-                elif ch == "}":
-                    depth -= 1
-                    if depth == 0 and start_idx is not None:
-                        snippet = content[start_idx : i + 1]
-                        try:
-                            return json.loads(_strip_code_fence(snippet))
-                        except Exception:
-                            pass
-            esc = False
 
         raise RuntimeError("LLM JSON could not be parsed. Ensure the response is valid JSON.")
 
@@ -1125,18 +1343,19 @@ def register_callbacks(app):
         return bool(re.match(r"^[A-Za-z]:[\\/]", path_str or ""))
 
     def _find_template_payload(obj):
-        if isinstance(obj, dict):
-            if "template" in obj and "data" in obj:
-                return obj
-            for value in obj.values():
-                found = _find_template_payload(value)
-                if found is not None:
-                    return found
-        elif isinstance(obj, list):
-            for value in obj:
-                found = _find_template_payload(value)
-                if found is not None:
-                    return found
+        # Well-formed responses carry the keys at the root; check before
+        # setting up the traversal.
+        if isinstance(obj, dict) and "template" in obj and "data" in obj:
+            return obj
+        queue = deque([obj])
+        while queue:
+            current = queue.popleft()
+            if isinstance(current, dict):
+                if "template" in current and "data" in current:
+                    return current
+                queue.extend(current.values())
+            elif isinstance(current, list):
+                queue.extend(current)
         return None
 
     def _extract_sample(parsed):
@@ -1179,6 +1398,15 @@ def register_callbacks(app):
             return None, "sample is not a JSON object"
         template = sample.get("template")
         data = sample.get("data")
+        if (
+            isinstance(template, dict)
+            and isinstance(data, dict)
+            and "template" not in template
+            and "template" not in data
+        ):
+            # Well-formed sample: nothing to re-parse and no nested payload
+            # for _find_template_payload to dig out.
+            return {"template": template, "data": data}, ""
         template, err = _parse_jsonish(template, "template")
         if err:
             return None, err
@@ -1210,6 +1438,25 @@ def register_callbacks(app):
         languages,
         pages_min,
         pages_max,
+    ):
+        # Worker-thread entry point; the actual job runs on a private event
+        # loop so the per-sample OpenAI calls can overlap.
+        asyncio.run(
+            _run_dataset_job_async(
+                job_id, api_key, model, prompt_text, output_dir, sample_count, languages, pages_min, pages_max
+            )
+        )
+
+    async def _run_dataset_job_async(
+        job_id: str,
+        api_key: str,
+        model: str,
+        prompt_text: str,
+        output_dir: str,
+        sample_count: int,
+        languages,
+        pages_min,
+        pages_max,
     ):
         lang_list = [lang for lang in (languages or []) if lang] or ["any"]
         per_language = max(1, int(sample_count or 1))
@@ -1241,42 +1488,87 @@ def register_callbacks(app):
         written = 0
         errors = 0
         last_error = ""
+        version = 0
+
+        def _publish(done: bool = False) -> None:
+            nonlocal version
+            version += 1
+            state = {
+                "version": version,
+                "written": written,
+                "errors": errors,
+                "total": total_samples,
+                "log_preview": log_preview.copy(),
+                "prompt_tokens": total_prompt_tokens,
+                "completion_tokens": total_completion_tokens,
+                "last_error": last_error,
+            }
+            if done:
+                state["done"] = True
+            # Publish an immutable snapshot; a single dict assignment is
+            # atomic under the GIL, so readers need no lock and always see
+            # a consistent old-or-new state. _JOBS_LOCK now only guards
+            # adding/removing job ids.
+            _JOBS[job_id] = state
+
+        pending_writes: List[Any] = []
+        # prompt_text can be multi-KB; concatenate the invariant preamble once
+        # so each sample/batch only appends its short per-call suffix.
+        single_preamble = (
+            prompt_text
+            + "\\nReturn exactly one sample as a JSON object."
+            + "\\nThe JSON object must have top-level keys 'template' and 'data'."
+        )
+        client = _make_async_openai_client(api_key)
+        # Bound in-flight requests so a large job doesn't trip rate limits.
+        sem = asyncio.Semaphore(int(os.environ.get("OPENAI_CONCURRENCY", "8")))
+
+        async def _one_sample(sample_idx: int, lang: str, target_pages: int) -> None:
+            nonlocal written, errors, last_error, total_prompt_tokens, total_completion_tokens
+            single_prompt = (
+                single_preamble
+                + f"\\nTarget language: {lang}. Use only this language for labels and values."
+                + f"\\nTarget pages: {target_pages}. Adjust item counts/notes/sections to reach about this many pages."
+            )
 
-        sample_idx = 0
-        for lang in lang_list:
-            for lang_idx in range(per_language):
-                sample_idx += 1
-                target_pages = page_targets[lang_idx]
-                single_prompt = (
-                    prompt_text
-                    + "\\nReturn exactly one sample as a JSON object."
-                    + "\\nThe JSON object must have top-level keys 'template' and 'data'."
-                    + f"\\nTarget language: {lang}. Use only this language for labels and values."
-                    + f"\\nTarget pages: {target_pages}. Adjust item counts/notes/sections to reach about this many pages."
+            async def _request_sample(prompt: str, suffix: str):
+                max_tokens = min(3500, 1200 + target_pages * 350)
+                llm_response, prompt_tokens, completion_tokens, used_json_mode = await _call_openai_async(
+                    client, model, prompt, max_tokens=max_tokens
                 )
-                def _request_sample(prompt: str, suffix: str):
-                    max_tokens = min(3500, 1200 + target_pages * 350)
-                    llm_response, prompt_tokens, completion_tokens = _call_openai(
-                        api_key, model, prompt, max_tokens=max_tokens
-                    )
-                    total_tokens = (prompt_tokens or 0, completion_tokens or 0)
-                    raw_name = f"llm_response_raw_{sample_idx:03d}{suffix}.txt"
-                    (target_dir / raw_name).write_text(llm_response, encoding="utf-8")
+                total_tokens = (prompt_tokens or 0, completion_tokens or 0)
+                raw_name = f"llm_response_raw_{sample_idx:03d}{suffix}.txt"
+                pending_writes.append(
+                    _get_io_pool().submit((target_dir / raw_name).write_text, llm_response, encoding="utf-8")
+                )
+                if used_json_mode:
+                    # json_object mode guarantees a single JSON object; decode
+                    # it against the envelope schema in one pass when msgspec
+                    # is available, trusting _loads otherwise, and keep the
+                    # lenient pipeline only as a safety net.
+                    parsed = schemas.decode_sample(llm_response)
+                    if parsed is None:
+                        try:
+                            parsed = _loads(llm_response)
+                        except ValueError:
+                            parsed = _parse_llm_json(llm_response)
+                else:
                     parsed = _parse_llm_json(llm_response)
-                    sample, reason = _extract_sample(parsed)
-                    return sample, reason, raw_name, total_tokens
-
-                def _attempt_payload(prompt: str, suffix: str):
-                    sample, reason, raw_name, tokens = _request_sample(prompt, suffix)
-                    if sample is None:
-                        return None, reason, raw_name, tokens
-                    payload, reason = _coerce_payload(sample)
-                    if payload is None:
-                        return None, reason, raw_name, tokens
-                    return payload, "", raw_name, tokens
+                sample, reason = _extract_sample(parsed)
+                return sample, reason, raw_name, total_tokens
+
+            async def _attempt_payload(prompt: str, suffix: str):
+                sample, reason, raw_name, tokens = await _request_sample(prompt, suffix)
+                if sample is None:
+                    return None, reason, raw_name, tokens
+                payload, reason = _coerce_payload(sample)
+                if payload is None:
+                    return None, reason, raw_name, tokens
+                return payload, "", raw_name, tokens
 
+            async with sem:
                 try:
-                    payload, reason, raw_name, tokens = _attempt_payload(single_prompt, "")
+                    payload, reason, raw_name, tokens = await _attempt_payload(single_prompt, "")
                     total_prompt_tokens += tokens[0]
                     total_completion_tokens += tokens[1]
                 except Exception as exc:
@@ -1284,22 +1576,11 @@ def register_callbacks(app):
                     last_error = f"sample {sample_idx} request/parse: {exc}"
                     print(f"[Dataset] Sample {sample_idx} failed to parse or request: {exc}")
                     (target_dir / f"sample_{sample_idx:03d}_error.txt").write_text(
-                        f"{last_error}\n\n{traceback.format_exc()}",
+                        _error_report(last_error, exc),
                         encoding="utf-8",
                     )
-                    with _JOBS_LOCK:
-                        _JOBS[job_id].update(
-                            {
-                                "written": written,
-                                "errors": errors,
-                                "total": total_samples,
-                                "log_preview": log_preview.copy(),
-                                "prompt_tokens": total_prompt_tokens,
-                                "completion_tokens": total_completion_tokens,
-                                "last_error": last_error,
-                            }
-                        )
-                    continue
+                    _publish()
+                    return
 
                 if payload is None:
                     retry_prompt = (
@@ -1309,7 +1590,7 @@ def register_callbacks(app):
                         f" Target language: {lang}. Target pages: {target_pages}."
                     )
                     try:
-                        payload, reason, retry_raw, tokens = _attempt_payload(retry_prompt, "_retry")
+                        payload, reason, retry_raw, tokens = await _attempt_payload(retry_prompt, "_retry")
                         total_prompt_tokens += tokens[0]
                         total_completion_tokens += tokens[1]
                         raw_name = retry_raw
@@ -1318,22 +1599,11 @@ def register_callbacks(app):
                         last_error = f"sample {sample_idx} retry failed: {exc}"
                         print(f"[Dataset] Sample {sample_idx} retry failed: {exc}")
                         (target_dir / f"sample_{sample_idx:03d}_error.txt").write_text(
-                            f"{last_error}\n\n{traceback.format_exc()}",
+                            _error_report(last_error, exc),
                             encoding="utf-8",
                         )
-                        with _JOBS_LOCK:
-                            _JOBS[job_id].update(
-                                {
-                                    "written": written,
-                                    "errors": errors,
-                                    "total": total_samples,
-                                    "log_preview": log_preview.copy(),
-                                    "prompt_tokens": total_prompt_tokens,
-                                    "completion_tokens": total_completion_tokens,
-                                    "last_error": last_error,
-                                }
-                            )
-                        continue
+                        _publish()
+                        return
 
                 if payload is None:
                     errors += 1
@@ -1343,80 +1613,129 @@ def register_callbacks(app):
                         f"{last_error}\nRaw response file: {raw_name}",
                         encoding="utf-8",
                     )
-                    with _JOBS_LOCK:
-                        _JOBS[job_id].update(
-                            {
-                                "written": written,
-                                "errors": errors,
-                                "total": total_samples,
-                                "log_preview": log_preview.copy(),
-                                "prompt_tokens": total_prompt_tokens,
-                                "completion_tokens": total_completion_tokens,
-                                "last_error": last_error,
-                            }
-                        )
-                    continue
+                    _publish()
+                    return
+
+            await _finish_sample(sample_idx, payload)
+
+        async def _finish_sample(sample_idx: int, payload: Dict[str, Any]) -> None:
+            nonlocal written, errors, last_error
+            # Render/save in a worker process so rasterization overlaps both
+            # the in-flight LLM calls and other samples' renders.
+            try:
+                loop = asyncio.get_running_loop()
+                payload_text = await loop.run_in_executor(
+                    _get_render_pool(), _render_and_save, payload, str(target_dir), sample_idx
+                )
+                written += 1
+                if len(log_preview) < 2:
+                    log_preview.append(payload_text)
+            except Exception as exc:
+                errors += 1
+                last_error = f"sample {sample_idx} render/save: {exc}"
+                print(f"[Dataset] Sample {sample_idx} failed during render/save: {exc}")
+                (target_dir / f"sample_{sample_idx:03d}_failed.json").write_text(
+                    _dump(payload),
+                    encoding="utf-8",
+                )
+                (target_dir / f"sample_{sample_idx:03d}_error.txt").write_text(
+                    _error_report(last_error, exc),
+                    encoding="utf-8",
+                )
+            _publish()
+
+        async def _one_batch(lang: str, entries: List[tuple]) -> None:
+            nonlocal last_error, total_prompt_tokens, total_completion_tokens
+            # One request for several samples amortizes the prompt tokens and
+            # round-trip; elements the model gets wrong fall back to the
+            # proven single-sample path.
+            if len(entries) == 1:
+                await _one_sample(entries[0][0], lang, entries[0][1])
+                return
+            n = len(entries)
+            first_idx = entries[0][0]
+            targets_desc = ", ".join(str(target_pages) for _, target_pages in entries)
+            batch_prompt = (
+                prompt_text
+                + f"\\nReturn exactly {n} samples as a JSON array of {n} objects."
+                + "\\nEach object must have top-level keys 'template' and 'data'."
+                + f"\\nTarget language: {lang}. Use only this language for labels and values."
+                + f"\\nTarget pages for each sample, in order: [{targets_desc}]. Adjust item counts/notes/sections to reach about that many pages."
+            )
+            max_tokens = min(3500 * n, sum(1200 + target_pages * 350 for _, target_pages in entries))
+            elements: List[Any] = []
+            async with sem:
                 try:
-                    html_str = build_html_export(payload)
-                    pdf_bytes = html_to_pdf_bytes(
-                        html_str, orientation=payload.get("template", {}).get("page", {}).get("orientation", "portrait")
+                    llm_response, prompt_tokens, completion_tokens, used_json_mode = await _call_openai_async(
+                        client, model, batch_prompt, max_tokens=max_tokens
                     )
-                    ocr_json = build_ocr_ground_truth(pdf_bytes, require_items=True)
-                    base_name = f"sample_{sample_idx:03d}_{uuid.uuid4().hex[:6]}"
-                    (target_dir / f"{base_name}.json").write_text(
-                        json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8"
+                    total_prompt_tokens += prompt_tokens or 0
+                    total_completion_tokens += completion_tokens or 0
+                    pending_writes.append(
+                        _get_io_pool().submit(
+                            (target_dir / f"llm_response_raw_{first_idx:03d}_batch.txt").write_text,
+                            llm_response,
+                            encoding="utf-8",
+                        )
                     )
-                    (target_dir / f"{base_name}.pdf").write_bytes(pdf_bytes)
-                    (target_dir / f"{base_name}.ocr.json").write_text(ocr_json, encoding="utf-8")
-                    written += 1
-                    if len(log_preview) < 2:
-                        log_preview.append(json.dumps(payload, ensure_ascii=False, indent=2))
+                    if used_json_mode:
+                        try:
+                            parsed = _loads(llm_response)
+                        except ValueError:
+                            parsed = _parse_llm_json(llm_response)
+                    else:
+                        parsed = _parse_llm_json(llm_response)
+                    elements = parsed if isinstance(parsed, list) else [parsed]
                 except Exception as exc:
-                    errors += 1
-                    last_error = f"sample {sample_idx} render/save: {exc}"
-                    print(f"[Dataset] Sample {sample_idx} failed during render/save: {exc}")
-                    (target_dir / f"sample_{sample_idx:03d}_failed.json").write_text(
-                        json.dumps(payload, ensure_ascii=False, indent=2),
-                        encoding="utf-8",
-                    )
-                    (target_dir / f"sample_{sample_idx:03d}_error.txt").write_text(
-                        f"{last_error}\n\n{traceback.format_exc()}",
-                        encoding="utf-8",
-                    )
-                    continue
+                    last_error = f"batch at sample {first_idx} failed: {exc}"
+                    print(f"[Dataset] Batch request failed ({exc}); falling back to single samples.")
+                    elements = []
+
+            fallbacks: List[tuple] = []
+            for pos, (sample_idx, target_pages) in enumerate(entries):
+                payload = None
+                if pos < len(elements):
+                    sample, _reason = _extract_sample(elements[pos])
+                    if sample is not None:
+                        payload, _reason = _coerce_payload(sample)
+                if payload is None:
+                    fallbacks.append((sample_idx, target_pages))
+                else:
+                    await _finish_sample(sample_idx, payload)
+            if fallbacks:
+                await asyncio.gather(*(_one_sample(idx, lang, target_pages) for idx, target_pages in fallbacks))
 
-                with _JOBS_LOCK:
-                    _JOBS[job_id].update(
-                        {
-                            "written": written,
-                            "errors": errors,
-                            "total": total_samples,
-                            "log_preview": log_preview.copy(),
-                            "prompt_tokens": total_prompt_tokens,
-                            "completion_tokens": total_completion_tokens,
-                            "last_error": last_error,
-                        }
-                    )
+        batch_size = max(1, int(os.environ.get("OPENAI_BATCH_SIZE", "4")))
+        task_args = []
+        sample_idx = 0
+        for lang in lang_list:
+            entries = []
+            for lang_idx in range(per_language):
+                sample_idx += 1
+                entries.append((sample_idx, page_targets[lang_idx]))
+            for start in range(0, len(entries), batch_size):
+                task_args.append((lang, entries[start : start + batch_size]))
 
-        with _JOBS_LOCK:
-            _JOBS[job_id].update(
-                {
-                    "written": written,
-                    "errors": errors,
-                    "total": total_samples,
-                    "done": True,
-                    "log_preview": log_preview.copy(),
-                    "prompt_tokens": total_prompt_tokens,
-                    "completion_tokens": total_completion_tokens,
-                    "last_error": last_error,
-                }
-            )
+        try:
+            await asyncio.gather(*(_one_batch(lang, chunk) for lang, chunk in task_args))
+        finally:
+            try:
+                await client.close()
+            except Exception as exc:  # noqa: BLE001
+                print(f"[Dataset] Client close failed: {exc}")
+            for write in pending_writes:
+                try:
+                    write.result()
+                except Exception as exc:  # noqa: BLE001
+                    print(f"[Dataset] Raw response write failed: {exc}")
+            _publish(done=True)
 
     @app.callback(
         Output("ds-status", "children", allow_duplicate=True),
         Output("ds-progress", "value", allow_duplicate=True),
         Output("ds-log", "children", allow_duplicate=True),
         Output("ds-job-id", "data", allow_duplicate=True),
+        Output("ds-progress-interval", "disabled", allow_duplicate=True),
         Input("ds-generate", "n_clicks"),
         State("ds-api-key", "value"),
         State("ds-model", "value"),
@@ -1445,10 +1764,10 @@ def register_callbacks(app):
             print(f"[Dataset] Generate clicked (n_clicks={_n})")
             if not api_key or not model:
                 print("[Dataset] Missing API key or model.")
-                return _status("Provide API key and model to generate.", "warning"), "0", "", None
+                return _status("Provide API key and model to generate.", "warning"), "0", "", None, True
             if not output_dir:
                 print("[Dataset] Missing output directory.")
-                return _status("Set an output directory first.", "warning"), "0", "", None
+                return _status("Set an output directory first.", "warning"), "0", "", None, True
             if os.name != "nt" and _is_windows_path(output_dir):
                 print(f"[Dataset] Output directory is Windows path: {output_dir}")
                 return (
@@ -1456,15 +1775,16 @@ def register_callbacks(app):
                     "0",
                     "",
                     None,
+                    True,
                 )
             try:
                 _ensure_dir(output_dir)
             except Exception as exc:
                 print(f"[Dataset] Output directory not writable: {exc}")
-                return _status(f"Output directory is not writable: {exc}", "warning"), "0", "", None
+                return _status(f"Output directory is not writable: {exc}", "warning"), "0", "", None, True
             if not prompt_text:
                 print("[Dataset] Missing prompt text.")
-                return _status("Create or paste a prompt first.", "warning"), "0", "", None
+                return _status("Create or paste a prompt first.", "warning"), "0", "", None, True
 
             lang_list = [lang for lang in (languages or []) if lang] or ["any"]
             per_language = max(1, int(sample_count or 1))
@@ -1473,6 +1793,7 @@ def register_callbacks(app):
             print(f"[Dataset] Starting job {job_id} for {per_language} per language ({total_samples} total)")
             with _JOBS_LOCK:
                 _JOBS[job_id] = {
+                    "version": 0,
                     "written": 0,
                     "errors": 0,
                     "total": total_samples,
@@ -1499,28 +1820,34 @@ def register_callbacks(app):
                 daemon=True,
             )
             thread.start()
-            return _status("Generation started...", "info"), "0", "", job_id
+            return _status("Generation started...", "info"), "0", "", job_id, False
         except Exception as exc:  # noqa: BLE001
             print(f"[Dataset] Failed to start job: {exc}")
-            return _status(f"Failed to start: {exc}", "danger"), "0", "", None
+            return _status(f"Failed to start: {exc}", "danger"), "0", "", None, True
 
     @app.callback(
         Output("ds-status", "children", allow_duplicate=True),
         Output("ds-progress", "value", allow_duplicate=True),
         Output("ds-log", "children", allow_duplicate=True),
+        Output("ds-poll-version", "data"),
+        Output("ds-progress-interval", "disabled", allow_duplicate=True),
         Input("ds-progress-interval", "n_intervals"),
         State("ds-job-id", "data"),
+        State("ds-poll-version", "data"),
         prevent_initial_call=True,
     )
-    def poll_dataset_job(_n, job_id):
+    def poll_dataset_job(_n, job_id, seen_version):
         if not job_id:
-            print("[Dataset] Poll: no job id")
-            return no_update, no_update, no_update
-        with _JOBS_LOCK:
-            info = _JOBS.get(job_id)
+            # No job running; stop the interval instead of ticking forever.
+            return no_update, no_update, no_update, no_update, True
+        info = _JOBS.get(job_id)
         if not info:
             print(f"[Dataset] Poll: job {job_id} not found")
-            return no_update, no_update, no_update
+            return no_update, no_update, no_update, no_update, True
+        version = info.get("version", 0)
+        if version == seen_version and not info.get("done"):
+            # Nothing changed since the last tick; skip re-rendering status.
+            raise PreventUpdate
         total = info.get("total", 1) or 1
         written = info.get("written", 0)
         errors = info.get("errors", 0)
@@ -1535,11 +1862,12 @@ def register_callbacks(app):
             f"Progress: {written}/{total} (errors: {errors}). Tokens: prompt_total={prompt_tokens}, completion_total={completion_tokens}.{error_note}",
             "info" if not info.get("done") else ("success" if errors == 0 else "warning"),
         )
-        if info.get("done"):
+        done = bool(info.get("done"))
+        if done:
             print(f"[Dataset] Job {job_id} done. Written {written}, errors {errors}")
             with _JOBS_LOCK:
                 _JOBS.pop(job_id, None)
-        return status, str(progress), log_text
+        return status, str(progress), log_text, version, done
 
     @app.callback(
         Output("ds-download", "data"),
@@ -1618,8 +1946,19 @@ def register_callbacks(app):
 
     # ---------- Model evaluation ----------
 
-    _EVAL_JOBS: Dict[str, Dict[str, Any]] = {}
+    _EVAL_JOBS: Dict[str, _EvalJob] = {}
     _EVAL_LOCK = threading.Lock()
+    # Finished jobs' artifact files, served by the streaming route below so
+    # large downloads never pass through the Dash store/base64 path.
+    _EVAL_FILES: Dict[str, Dict[str, str]] = {}
+
+    @app.server.route("/eval-file/<kind>/<job_id>")
+    def _serve_eval_file(kind, job_id):
+        path = _EVAL_FILES.get(job_id, {}).get(kind)
+        if not path or not Path(path).exists():
+            return "Not found", 404
+        download_name = "evaluation_results.json" if kind == "results" else "evaluation_plots.html"
+        return flask.send_file(path, as_attachment=True, download_name=download_name)
 
     def _build_eval_methods(ocr_sources, methods, models):
         method_list = []
@@ -1660,33 +1999,28 @@ def register_callbacks(app):
     def _format_eval_summary(results: Dict[str, Any]) -> str:
         lines = []
         for method, data in results.items():
-            overall = data.get("overall", {})
+            oget = data.get("overall", {}).get
             fields = data.get("fields", {})
-            worst = sorted(
-                fields.items(),
-                key=lambda kv: kv[1].get("normalized_rate", 1.0)
-                if kv[1].get("normalized_rate") is not None
-                else 1.0,
-            )[:5]
+            worst = heapq.nsmallest(5, fields.items(), key=_worst_key)
             worst_text = ", ".join(
                 [
                     f"{info.get('label', path)} ({info.get('normalized_rate', 0.0) or 0.0:.2f})"
                     for path, info in worst
                 ]
             )
-            item_acc = overall.get("item_field_accuracy", {})
+            item_acc = oget("item_field_accuracy", {})
             item_text = (
                 ", ".join([f"{k}: {(v or 0.0):.2f}" for k, v in item_acc.items()]) if item_acc else "n/a"
             )
             lines.extend(
                 [
                     f"### {method}",
-                    f"- Samples: {overall.get('sample_count', 0)}",
-                    f"- Exact match (macro): {(overall.get('exact_macro') or 0.0):.2f}",
-                    f"- Normalized match (macro): {(overall.get('normalized_macro') or 0.0):.2f}",
-                    f"- Token F1 (macro): {(overall.get('token_f1_macro') or 0.0):.2f}",
-                    f"- Char similarity (macro): {(overall.get('char_similarity_macro') or 0.0):.2f}",
-                    f"- Item precision/recall/F1: {(overall.get('item_precision') or 0.0):.2f} / {(overall.get('item_recall') or 0.0):.2f} / {(overall.get('item_f1') or 0.0):.2f}",
+                    f"- Samples: {oget('sample_count', 0)}",
+                    f"- Exact match (macro): {(oget('exact_macro') or 0.0):.2f}",
+                    f"- Normalized match (macro): {(oget('normalized_macro') or 0.0):.2f}",
+                    f"- Token F1 (macro): {(oget('token_f1_macro') or 0.0):.2f}",
+                    f"- Char similarity (macro): {(oget('char_similarity_macro') or 0.0):.2f}",
+                    f"- Item precision/recall/F1: {(oget('item_precision') or 0.0):.2f} / {(oget('item_recall') or 0.0):.2f} / {(oget('item_f1') or 0.0):.2f}",
                     f"- Item field accuracy: {item_text}",
                     f"- Worst fields (normalized): {worst_text if worst_text else 'n/a'}",
                     "",
@@ -1696,26 +2030,22 @@ def register_callbacks(app):
 
     def _format_eval_errors(results: Dict[str, Any]) -> str:
         lines = []
+        append = lines.append
         for method, data in results.items():
-            lines.append(method)
+            append(method)
             fields = data.get("fields", {})
-            worst = sorted(
-                fields.items(),
-                key=lambda kv: kv[1].get("normalized_rate", 1.0)
-                if kv[1].get("normalized_rate") is not None
-                else 1.0,
-            )[:4]
-            errors = data.get("errors", {})
+            worst = heapq.nsmallest(4, fields.items(), key=_worst_key)
+            errors_get = data.get("errors", {}).get
             for path, info in worst:
-                examples = errors.get(path, [])[:2]
+                examples = errors_get(path, [])[:2]
                 if not examples:
                     continue
-                lines.append(f"  {info.get('label', path)} ({path})")
+                append(f"  {info.get('label', path)} ({path})")
                 for ex in examples:
                     gt = str(ex.get("gt", ""))
                     pred = str(ex.get("pred", ""))
-                    lines.append(f"    {ex.get('sample', '')}: gt='{gt}' | pred='{pred}'")
-            lines.append("")
+                    append(f"    {ex.get('sample', '')}: gt='{gt}' | pred='{pred}'")
+            append("")
         return "\n".join(lines).strip()
 
     def _format_runtime_errors(errors: List[str]) -> str:
@@ -1729,7 +2059,12 @@ def register_callbacks(app):
         payload = results_data
         if isinstance(results_data, str):
             try:
-                payload = json.loads(results_data)
+                payload = _loads(results_data)
+            except Exception:
+                return {}
+        if isinstance(payload, dict) and "results" not in payload and payload.get("results_path"):
+            try:
+                payload = _loads(Path(payload["results_path"]).read_text(encoding="utf-8"))
             except Exception:
                 return {}
         if isinstance(payload, dict) and isinstance(payload.get("results"), dict):
@@ -1738,13 +2073,9 @@ def register_callbacks(app):
 
     def _build_eval_figures(results: Dict[str, Any]) -> Dict[str, Any]:
         if not results:
-            return {
-                "overall": go.Figure(),
-                "items": go.Figure(),
-                "fields": go.Figure(),
-                "item_fields": go.Figure(),
-            }
+            return {key: _EMPTY_GO_FIG for key in ("overall", "items", "fields", "item_fields")}
         methods = list(results.keys())
+        overalls = [results[m].get("overall", {}) for m in methods]
         overall_metrics = [
             ("exact_macro", "Exact macro"),
             ("normalized_macro", "Normalized macro"),
@@ -1753,12 +2084,13 @@ def register_callbacks(app):
         ]
         fig_overall = go.Figure()
         for key, label in overall_metrics:
+            vals = [overall.get(key, 0.0) or 0.0 for overall in overalls]
             fig_overall.add_trace(
                 go.Bar(
                     name=label,
                     x=methods,
-                    y=[results[m].get("overall", {}).get(key, 0.0) or 0.0 for m in methods],
-                    text=[f"{(results[m].get('overall', {}).get(key) or 0.0):.2f}" for m in methods],
+                    y=vals,
+                    text=[f"{val:.2f}" for val in vals],
                     textposition="auto",
                 )
             )
@@ -1772,12 +2104,13 @@ def register_callbacks(app):
         item_metrics = [("item_precision", "Item precision"), ("item_recall", "Item recall"), ("item_f1", "Item F1")]
         fig_items = go.Figure()
         for key, label in item_metrics:
+            vals = [overall.get(key, 0.0) or 0.0 for overall in overalls]
             fig_items.add_trace(
                 go.Bar(
                     name=label,
                     x=methods,
-                    y=[results[m].get("overall", {}).get(key, 0.0) or 0.0 for m in methods],
-                    text=[f"{(results[m].get('overall', {}).get(key) or 0.0):.2f}" for m in methods],
+                    y=vals,
+                    text=[f"{val:.2f}" for val in vals],
                     textposition="auto",
                 )
             )
@@ -1792,27 +2125,48 @@ def register_callbacks(app):
         fields_data = results[sample_method].get("fields", {})
         field_paths = list(fields_data.keys())
         field_labels = [fields_data[path].get("label", path) for path in field_paths]
-        z_vals = []
-        custom = []
-        for path in field_paths:
-            row = []
-            custom_row = []
-            for method in methods:
-                info = results[method].get("fields", {}).get(path, {})
-                if info.get("normalized_rate") is None:
-                    row.append(None)
-                else:
-                    row.append(info.get("normalized_rate", 0.0))
-                custom_row.append(
-                    [
-                        info.get("exact_rate", 0.0) or 0.0,
-                        info.get("token_f1", 0.0) or 0.0,
-                        info.get("char_similarity", 0.0) or 0.0,
-                        info.get("present_rate", 0.0) or 0.0,
-                    ]
-                )
-            z_vals.append(row)
-            custom.append(custom_row)
+        # Snapshot the per-method field dicts once instead of two .get() hops
+        # per heatmap cell.
+        fields_by_method = [results[method].get("fields", {}) for method in methods]
+        if np is not None:
+            # Preallocated arrays serialize through plotly's binary fast path;
+            # NaN renders as a missing cell just like None.
+            z_vals = np.full((len(field_paths), len(methods)), np.nan)
+            custom = np.zeros((len(field_paths), len(methods), 4))
+            for i, path in enumerate(field_paths):
+                for j, fields in enumerate(fields_by_method):
+                    info = fields.get(path)
+                    if not info:
+                        continue
+                    rate = info.get("normalized_rate")
+                    if rate is not None:
+                        z_vals[i, j] = rate
+                    custom[i, j, 0] = info.get("exact_rate", 0.0) or 0.0
+                    custom[i, j, 1] = info.get("token_f1", 0.0) or 0.0
+                    custom[i, j, 2] = info.get("char_similarity", 0.0) or 0.0
+                    custom[i, j, 3] = info.get("present_rate", 0.0) or 0.0
+        else:
+            z_vals = []
+            custom = []
+            for path in field_paths:
+                row = []
+                custom_row = []
+                for fields in fields_by_method:
+                    info = fields.get(path, {})
+                    if info.get("normalized_rate") is None:
+                        row.append(None)
+                    else:
+                        row.append(info.get("normalized_rate", 0.0))
+                    custom_row.append(
+                        [
+                            info.get("exact_rate", 0.0) or 0.0,
+                            info.get("token_f1", 0.0) or 0.0,
+                            info.get("char_similarity", 0.0) or 0.0,
+                            info.get("present_rate", 0.0) or 0.0,
+                        ]
+                    )
+                z_vals.append(row)
+                custom.append(custom_row)
         fig_fields = go.Figure(
             data=go.Heatmap(
                 z=z_vals,
@@ -1840,13 +2194,8 @@ def register_callbacks(app):
 
         item_field_keys = list(results[sample_method].get("overall", {}).get("item_field_accuracy", {}).keys())
         if item_field_keys:
-            item_z = [
-                [
-                    results[m].get("overall", {}).get("item_field_accuracy", {}).get(key, 0.0) or 0.0
-                    for m in methods
-                ]
-                for key in item_field_keys
-            ]
+            acc_by_method = [results[m].get("overall", {}).get("item_field_accuracy", {}) for m in methods]
+            item_z = [[acc.get(key, 0.0) or 0.0 for acc in acc_by_method] for key in item_field_keys]
             fig_item_fields = go.Figure(
                 data=go.Heatmap(
                     z=item_z,
@@ -1866,15 +2215,30 @@ def register_callbacks(app):
         else:
             fig_item_fields = go.Figure()
 
+        # Plain dicts: Dash serializes them directly instead of running the
+        # figure objects through PlotlyJSONEncoder, and pio.to_html accepts
+        # dict figures for the saved/downloaded documents.
         return {
-            "overall": fig_overall,
-            "items": fig_items,
-            "fields": fig_fields,
-            "item_fields": fig_item_fields,
+            "overall": fig_overall.to_plotly_json(),
+            "items": fig_items.to_plotly_json(),
+            "fields": fig_fields.to_plotly_json(),
+            "item_fields": fig_item_fields.to_plotly_json(),
         }
 
-    def _figures_to_html(figures: Dict[str, Any]) -> str:
-        sections = []
+    def _write_figures_html(figures: Dict[str, Any], write, include_js: str = "cdn") -> None:
+        """Emit the plots document through write() piece by piece.
+
+        Each figure's HTML is multi-MB for large heatmaps; streaming the
+        pieces lets _run_eval_job write straight to disk instead of
+        concatenating them all into one string first.
+        """
+        write(
+            "<html><head><meta charset=\"utf-8\"/>"
+            "<title>Evaluation plots</title>"
+            "<style>body{font-family:Segoe UI,Arial,sans-serif;margin:20px}h2{margin-top:28px}</style>"
+            "</head><body>"
+            "<h1>Evaluation plots</h1>"
+        )
         order = [
             ("Overall metrics (macro)", figures.get("overall")),
             ("Item metrics", figures.get("items")),
@@ -1885,20 +2249,36 @@ def register_callbacks(app):
         for title, fig in order:
             if fig is None:
                 continue
-            include_js = "cdn" if first else False
+            write(f"<h2>{title}</h2>")
+            write(pio.to_html(fig, include_plotlyjs=include_js if first else False, full_html=False))
             first = False
-            fig_html = pio.to_html(fig, include_plotlyjs=include_js, full_html=False)
-            sections.append(f"<h2>{title}</h2>{fig_html}")
-        body = "\n".join(sections)
-        return (
-            "<html><head><meta charset=\"utf-8\"/>"
-            "<title>Evaluation plots</title>"
-            "<style>body{font-family:Segoe UI,Arial,sans-serif;margin:20px}h2{margin-top:28px}</style>"
-            "</head><body>"
-            "<h1>Evaluation plots</h1>"
-            f"{body}"
-            "</body></html>"
-        )
+        write("</body></html>")
+
+    def _figures_to_html(figures: Dict[str, Any]) -> str:
+        parts: List[str] = []
+        _write_figures_html(figures, parts.append)
+        return "".join(parts)
+
+    def _eval_figures_cached(results: Dict[str, Any]) -> Dict[str, Any]:
+        """Build (or reuse) the four result figures for a results payload.
+
+        poll_eval_job builds them when a job finishes and the plots download
+        asks for the same payload right after; sharing the export cache means
+        the second caller gets a dict hit instead of a full plotly rebuild.
+        """
+        if not results:
+            return _build_eval_figures(results)
+        key = _payload_key(results)
+        return _export_cached("eval-figs", key, lambda: _build_eval_figures(results))
+
+    _empty_figs_cache: Dict[str, Any] = {}
+
+    def _empty_eval_figs() -> Dict[str, Any]:
+        # go.Figure() construction is not free and the validation early
+        # returns never mutate these, so one shared set serves them all.
+        if not _empty_figs_cache:
+            _empty_figs_cache.update(_build_eval_figures({}))
+        return _empty_figs_cache
 
     def _run_eval_job(job_id: str, config: Dict[str, Any]):
         dataset_path = Path(config["dataset_path"])
@@ -1914,94 +2294,186 @@ def register_callbacks(app):
         results: Dict[str, Any] = {}
         aggregates = {method["name"]: evaluation.init_aggregate() for method in methods}
 
+        ocr_cache_dir = None
+        if config.get("use_ocr_cache", True):
+            ocr_cache_dir = dataset_path / ".ocr_cache"
+            try:
+                ocr_cache_dir.mkdir(exist_ok=True)
+            except OSError:
+                ocr_cache_dir = None
+
         done_steps = 0
+        last_flushed = 0
+        last_flush_time = time.monotonic()
+
+        def _record_step(method_name: str, sample_id: str) -> None:
+            # The UI only polls every second, so per-step lock traffic is
+            # wasted; flush every 16 steps / 200 ms and once at the end.
+            nonlocal done_steps, last_flushed, last_flush_time
+            done_steps += 1
+            now = time.monotonic()
+            if done_steps < total_steps and done_steps - last_flushed < 16 and now - last_flush_time < 0.2:
+                return
+            last_flushed = done_steps
+            last_flush_time = now
+            with _EVAL_LOCK:
+                job = _EVAL_JOBS[job_id]
+                job.done_steps = done_steps
+                job.total_steps = total_steps
+                job.current_method = method_name
+                job.current_sample = sample_id
+
+        def _score(method: Dict[str, Any], sample: Dict[str, Any], pred: Dict[str, Any]) -> None:
+            visible_paths = sample.get("visible_paths") if config.get("visible_only") else None
+            items_visible = sample.get("items_visible") if config.get("visible_only") else None
+            sample_result = evaluation.evaluate_prediction(
+                sample["data"],
+                pred,
+                sample["id"],
+                visible_paths=visible_paths,
+                items_visible=items_visible,
+            )
+            evaluation.update_aggregate(aggregates[method["name"]], sample_result)
+            _record_step(method["name"], sample["id"])
+
+        overrides = config.get("model_overrides", {})
+        default_api_key = config.get("api_key")
+        default_api_base = config.get("api_base_url")
+
+        def _llm_predict(method: Dict[str, Any], payload) -> Dict[str, Any]:
+            override = overrides.get(method["model"])
+            method_api_key = (override.get("api_key") if override else None) or default_api_key
+            method_api_base = (override.get("api_base_url") if override else None) or default_api_base
+            if method["kind"] == "llm_vision":
+                return evaluation.llm_extract_vision(
+                    method_api_key,
+                    method["model"],
+                    payload,
+                    api_base_url=method_api_base,
+                    gemini_api_key=config.get("gemini_api_key"),
+                    anthropic_api_key=config.get("anthropic_api_key"),
+                )
+            pred = evaluation.llm_extract_text(
+                method_api_key,
+                method["model"],
+                payload,
+                api_base_url=method_api_base,
+                gemini_api_key=config.get("gemini_api_key"),
+                anthropic_api_key=config.get("anthropic_api_key"),
+            )
+            if method["kind"] == "llm_text_hybrid":
+                fallback = evaluation.pattern_extract(payload)
+                pred = evaluation.merge_missing_fields(pred, fallback)
+            return pred
+
+        # Phase 0: the tesseract/easyocr engines are CPU-bound native code, so
+        # OCR every (sample, engine) pair across worker processes up front.
+        # pymupdf and ocr_json reads stay inline; they are milliseconds each.
+        heavy_srcs = sorted(
+            {m.get("ocr_source") for m in methods if m.get("ocr_source") in ("tesseract", "easyocr")}
+        )
+        ocr_texts: Dict[tuple, str] = {}
+        if heavy_srcs and len(samples) > 1:
+            with ProcessPoolExecutor(max_workers=os.cpu_count()) as ocr_pool:
+                ocr_futures = {
+                    ocr_pool.submit(_ocr_dispatch, src, sample["pdf_path"], ocr_cache_dir): (sample["id"], src)
+                    for sample in samples
+                    for src in heavy_srcs
+                }
+                for future in as_completed(ocr_futures):
+                    sid, src = ocr_futures[future]
+                    try:
+                        ocr_texts[(sid, src)] = future.result()
+                    except Exception:  # noqa: BLE001
+                        # Leave the pair unset; the inline path below retries it
+                        # and charges any repeat failure to each affected method.
+                        pass
+
+        # Every OCR source any method needs; each sample's text cache is
+        # filled for this set in one straight pass instead of branchy
+        # per-method dispatch inside the scoring loop.
+        needed_srcs = sorted({m.get("ocr_source") for m in methods if m.get("ocr_source")})
+
+        def _fill_text_cache(sample: Dict[str, Any]) -> Dict[str, Any]:
+            cache: Dict[str, Any] = {}
+            for src in needed_srcs:
+                try:
+                    if (sample["id"], src) in ocr_texts:
+                        cache[src] = ocr_texts.pop((sample["id"], src))
+                    elif src == "pymupdf":
+                        cache[src] = _extract_text_cached(
+                            ocr_cache_dir, src, sample["pdf_path"], evaluation.extract_text_pymupdf
+                        )
+                    elif src == "tesseract":
+                        cache[src] = _extract_text_cached(
+                            ocr_cache_dir, src, sample["pdf_path"], evaluation.extract_text_tesseract
+                        )
+                    elif src == "easyocr":
+                        cache[src] = _extract_text_cached(
+                            ocr_cache_dir, src, sample["pdf_path"], evaluation.extract_text_easyocr
+                        )
+                    elif src == "ocr_json":
+                        cache[src] = evaluation.extract_text_from_ocr_json(sample["ocr_path"])
+                    else:
+                        cache[src] = ""
+                except Exception as exc:  # noqa: BLE001
+                    # Re-raised per method below so error attribution matches
+                    # the old inline-extraction behavior.
+                    cache[src] = exc
+            return cache
+
+        # Phase 1 (serial): run extraction once per (sample, source), score the
+        # cheap CPU-bound methods inline and queue the network-bound LLM calls.
+        llm_tasks: List[tuple] = []
         for sample in samples:
-            text_cache: Dict[str, str] = {}
+            text_cache = _fill_text_cache(sample)
             images_cache = None
             for method in methods:
                 try:
-                    model_override = {}
-                    if method.get("model"):
-                        model_override = config.get("model_overrides", {}).get(method["model"], {})
-                    method_api_key = model_override.get("api_key") or config.get("api_key")
-                    method_api_base = model_override.get("api_base_url") or config.get("api_base_url")
                     if method["kind"] in ("regex", "key_value", "pattern", "ensemble", "llm_text", "llm_text_hybrid"):
-                        src = method.get("ocr_source")
-                        if src not in text_cache:
-                            if src == "pymupdf":
-                                text_cache[src] = evaluation.extract_text_pymupdf(sample["pdf_path"])
-                            elif src == "tesseract":
-                                text_cache[src] = evaluation.extract_text_tesseract(sample["pdf_path"])
-                            elif src == "easyocr":
-                                text_cache[src] = evaluation.extract_text_easyocr(sample["pdf_path"])
-                            elif src == "ocr_json":
-                                text_cache[src] = evaluation.extract_text_from_ocr_json(sample["ocr_path"])
-                            else:
-                                text_cache[src] = ""
+                        text = text_cache.get(method.get("ocr_source"), "")
+                        if isinstance(text, Exception):
+                            raise text
                         if method["kind"] == "regex":
-                            pred = evaluation.regex_extract(text_cache[src])
+                            pred = evaluation.regex_extract(text)
                         elif method["kind"] == "key_value":
-                            pred = evaluation.kv_extract(text_cache[src])
+                            pred = evaluation.kv_extract(text)
                         elif method["kind"] == "pattern":
-                            pred = evaluation.pattern_extract(text_cache[src])
+                            pred = evaluation.pattern_extract(text)
                         elif method["kind"] == "ensemble":
-                            pred = evaluation.ensemble_extract(text_cache[src])
-                        elif method["kind"] == "llm_text_hybrid":
-                            pred = evaluation.llm_extract_text(
-                                method_api_key,
-                                method["model"],
-                                text_cache[src],
-                                api_base_url=method_api_base,
-                                gemini_api_key=config.get("gemini_api_key"),
-                                anthropic_api_key=config.get("anthropic_api_key"),
-                            )
-                            fallback = evaluation.pattern_extract(text_cache[src])
-                            pred = evaluation.merge_missing_fields(pred, fallback)
+                            pred = evaluation.ensemble_extract(text)
                         else:
-                            pred = evaluation.llm_extract_text(
-                                method_api_key,
-                                method["model"],
-                                text_cache[src],
-                                api_base_url=method_api_base,
-                                gemini_api_key=config.get("gemini_api_key"),
-                                anthropic_api_key=config.get("anthropic_api_key"),
-                            )
+                            llm_tasks.append((method, sample, text))
+                            continue
                     else:
                         if images_cache is None:
                             images_cache = evaluation.images_for_llm(sample["pdf_path"], config.get("max_pages", 2))
-                        pred = evaluation.llm_extract_vision(
-                            method_api_key,
-                            method["model"],
-                            images_cache,
-                            api_base_url=method_api_base,
-                            gemini_api_key=config.get("gemini_api_key"),
-                            anthropic_api_key=config.get("anthropic_api_key"),
-                        )
+                        llm_tasks.append((method, sample, images_cache))
+                        continue
                 except Exception as exc:  # noqa: BLE001
                     pred = {}
                     with _EVAL_LOCK:
-                        _EVAL_JOBS[job_id]["errors"].append(f"{method['name']} {sample['id']}: {exc}")
-
-                visible_paths = sample.get("visible_paths") if config.get("visible_only") else None
-                items_visible = sample.get("items_visible") if config.get("visible_only") else None
-                sample_result = evaluation.evaluate_prediction(
-                    sample["data"],
-                    pred,
-                    sample["id"],
-                    visible_paths=visible_paths,
-                    items_visible=items_visible,
-                )
-                evaluation.update_aggregate(aggregates[method["name"]], sample_result)
-                done_steps += 1
-                with _EVAL_LOCK:
-                    _EVAL_JOBS[job_id].update(
-                        {
-                            "done_steps": done_steps,
-                            "total_steps": total_steps,
-                            "current_method": method["name"],
-                            "current_sample": sample["id"],
-                        }
-                    )
+                        _EVAL_JOBS[job_id].errors.append(f"{method['name']} {sample['id']}: {exc}")
+                _score(method, sample, pred)
+
+        # Phase 2: the LLM calls spend most of their time waiting on HTTP, so
+        # run them concurrently; scoring stays on this thread via as_completed.
+        if llm_tasks:
+            workers = max(1, int(config.get("parallelism", 8)))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                future_map = {
+                    pool.submit(_llm_predict, method, payload): (method, sample)
+                    for method, sample, payload in llm_tasks
+                }
+                for future in as_completed(future_map):
+                    method, sample = future_map[future]
+                    try:
+                        pred = future.result()
+                    except Exception as exc:  # noqa: BLE001
+                        pred = {}
+                        with _EVAL_LOCK:
+                            _EVAL_JOBS[job_id].errors.append(f"{method['name']} {sample['id']}: {exc}")
+                    _score(method, sample, pred)
 
         for method in methods:
             results[method["name"]] = evaluation.finalize_aggregate(aggregates[method["name"]])
@@ -2012,30 +2484,57 @@ def register_callbacks(app):
         if config.get("save_plots"):
             try:
                 figures = _build_eval_figures(results)
-                html_content = _figures_to_html(figures)
-                stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                stamp = time.strftime("%Y%m%d_%H%M%S")
                 plots_path = dataset_path / f"evaluation_plots_{stamp}.html"
-                plots_path.write_text(html_content, encoding="utf-8")
+                # Saved plots reference a plotly.min.js written once next to
+                # them, so repeated saves view offline with no CDN fetch. The
+                # browser download keeps the CDN include since it is a single
+                # standalone file.
+                js_path = dataset_path / "plotly.min.js"
+                if not js_path.exists():
+                    from plotly.offline import get_plotlyjs
+
+                    js_path.write_text(get_plotlyjs(), encoding="utf-8")
+                with plots_path.open("w", encoding="utf-8") as handle:
+                    _write_figures_html(figures, handle.write, include_js="directory")
             except Exception as exc:  # noqa: BLE001
                 with _EVAL_LOCK:
-                    _EVAL_JOBS[job_id]["errors"].append(f"plots: {exc}")
+                    _EVAL_JOBS[job_id].errors.append(f"plots: {exc}")
         if plots_path:
             plots_line = f"Saved plots: `{plots_path}`"
             summary = f"{summary}\n\n{plots_line}" if summary else plots_line
+        # Persist the full payload server-side; the browser store only gets a
+        # small manifest pointing at this file.
         with _EVAL_LOCK:
-            _EVAL_JOBS[job_id].update(
-                {
-                    "done": True,
-                    "results": results,
-                    "summary": summary,
-                    "errors_text": errors_text,
-                    "plots_path": str(plots_path) if plots_path else None,
-                }
+            runtime_errors = list(_EVAL_JOBS[job_id].errors)
+        results_path = dataset_path / f"evaluation_results_{job_id}.json"
+        try:
+            results_path.write_text(
+                _dump(
+                    {
+                        "results": results,
+                        "runtime_errors": runtime_errors,
+                        "plots_path": str(plots_path) if plots_path else None,
+                    }
+                ),
+                encoding="utf-8",
             )
+        except OSError as exc:
+            results_path = None
+            with _EVAL_LOCK:
+                _EVAL_JOBS[job_id].errors.append(f"results file: {exc}")
+        with _EVAL_LOCK:
+            job = _EVAL_JOBS[job_id]
+            job.results = results
+            job.summary = summary
+            job.errors_text = errors_text
+            job.plots_path = str(plots_path) if plots_path else None
+            job.results_path = str(results_path) if results_path else None
+            job.done = True
 
     @app.callback(
         Output("eval-status", "children", allow_duplicate=True),
-        Output("eval-progress", "value", allow_duplicate=True),
+        Output("eval-progress-store", "data", allow_duplicate=True),
         Output("eval-summary", "children", allow_duplicate=True),
         Output("eval-errors", "children", allow_duplicate=True),
         Output("eval-runtime-errors", "children", allow_duplicate=True),
@@ -2089,7 +2588,7 @@ def register_callbacks(app):
         custom_models,
         max_pages,
     ):
-        empty_figs = _build_eval_figures({})
+        empty_figs = _empty_eval_figs()
         dataset_path = (dataset_path or "").strip()
         api_key = (api_key or "").strip()
         api_base_url = (api_base_url or "").strip()
@@ -2108,7 +2607,7 @@ def register_callbacks(app):
         if not resolved_dataset_path:
             return (
                 _status("Pick a dataset first.", "warning"),
-                "0",
+                0,
                 "",
                 "",
                 "",
@@ -2122,7 +2621,7 @@ def register_callbacks(app):
         if os.name != "nt" and _is_windows_path(resolved_dataset_path):
             return (
                 _status("Dataset path is a Windows path. Use a server path like /data/datasets.", "warning"),
-                "0",
+                0,
                 "",
                 "",
                 "",
@@ -2137,7 +2636,7 @@ def register_callbacks(app):
         if not dataset_root.exists():
             return (
                 _status(f"Dataset path not found on server: {resolved_dataset_path}", "warning"),
-                "0",
+                0,
                 "",
                 "",
                 "",
@@ -2152,7 +2651,7 @@ def register_callbacks(app):
         if not samples:
             return (
                 _status("No dataset samples found.", "warning"),
-                "0",
+                0,
                 "",
                 "",
                 "",
@@ -2166,29 +2665,29 @@ def register_callbacks(app):
         methods = methods or []
         ocr_sources = ocr_sources or []
         models = [model for model in (models or []) if model]
-        custom_models = [m.strip() for m in re.split(r"[,\n;]+", custom_models or "") if m.strip()]
+        custom_models = [m.strip() for m in _SEP_RE.split(custom_models or "") if m.strip()]
         if custom_models:
             models.extend(custom_models)
-        seen_models = set()
-        models = [m for m in models if not (m in seen_models or seen_models.add(m))]
-        alt_tokens = [t.strip().lower() for t in re.split(r"[,\n;]+", api_key_alt_match or "") if t.strip()]
-
-        def _uses_alt(model: str) -> bool:
-            if not alt_tokens:
-                return False
-            norm = (model or "").lower()
-            return any(token in norm for token in alt_tokens)
+        models = list(dict.fromkeys(models))
+        alt_tokens = [t.strip().lower() for t in _SEP_RE.split(api_key_alt_match or "") if t.strip()]
+        # Resolve the secondary-key matches once; the result is consulted for
+        # every model in several places below.
+        alt_models = (
+            {model for model in models if any(token in (model or "").lower() for token in alt_tokens)}
+            if alt_tokens
+            else set()
+        )
 
         requires_openai_key = any(
             not evaluation.is_gemini_model(model)
             and not evaluation.is_claude_model(model)
-            and not _uses_alt(model)
+            and model not in alt_models
             for model in models
         )
         if ("llm_text" in methods or "llm_vision" in methods or "llm_text_hybrid" in methods) and requires_openai_key and not api_key:
             return (
                 _status("Provide an API key for LLM methods.", "warning"),
-                "0",
+                0,
                 "",
                 "",
                 "",
@@ -2202,7 +2701,7 @@ def register_callbacks(app):
         if ("llm_text" in methods or "llm_vision" in methods or "llm_text_hybrid" in methods) and not models:
             return (
                 _status("Select at least one LLM model.", "warning"),
-                "0",
+                0,
                 "",
                 "",
                 "",
@@ -2213,10 +2712,10 @@ def register_callbacks(app):
                 None,
                 None,
             )
-        if any(_uses_alt(model) for model in models) and not api_key_alt:
+        if alt_models and not api_key_alt:
             return (
                 _status("Provide a secondary API key for the matching models.", "warning"),
-                "0",
+                0,
                 "",
                 "",
                 "",
@@ -2230,7 +2729,7 @@ def register_callbacks(app):
         if any(evaluation.is_gemini_model(model) for model in models) and not gemini_api_key:
             return (
                 _status("Provide a Gemini API key for Gemini models.", "warning"),
-                "0",
+                0,
                 "",
                 "",
                 "",
@@ -2244,7 +2743,7 @@ def register_callbacks(app):
         if any(evaluation.is_claude_model(model) for model in models) and not anthropic_api_key:
             return (
                 _status("Provide an Anthropic API key for Claude models.", "warning"),
-                "0",
+                0,
                 "",
                 "",
                 "",
@@ -2278,7 +2777,7 @@ def register_callbacks(app):
         ) and not filtered_ocr:
             return (
                 _status("Select at least one OCR source.", "warning"),
-                "0",
+                0,
                 "",
                 "",
                 "",
@@ -2294,7 +2793,7 @@ def register_callbacks(app):
         if not eval_methods:
             return (
                 _status("No evaluation methods selected.", "warning"),
-                "0",
+                0,
                 "",
                 "",
                 "",
@@ -2309,18 +2808,13 @@ def register_callbacks(app):
         sample_count = min(sample_limit or len(samples), len(samples))
         job_id = uuid.uuid4().hex
         with _EVAL_LOCK:
-            _EVAL_JOBS[job_id] = {
-                "done": False,
-                "errors": [],
-                "done_steps": 0,
-                "total_steps": max(1, len(eval_methods) * sample_count),
-            }
+            _EVAL_JOBS[job_id] = _EvalJob(total_steps=max(1, len(eval_methods) * sample_count))
         api_base_url = (api_base_url or "").strip()
         api_base_url_alt = (api_base_url_alt or "").strip()
         model_overrides = {}
-        if api_key_alt and alt_tokens:
+        if api_key_alt and alt_models:
             for model in models:
-                if _uses_alt(model):
+                if model in alt_models:
                     model_overrides[model] = {
                         "api_key": api_key_alt,
                         "api_base_url": api_base_url_alt or api_base_url,
@@ -2345,7 +2839,7 @@ def register_callbacks(app):
         skipped_note = f" Skipped: {', '.join(skipped)}." if skipped else ""
         return (
             _status(f"Evaluation started.{skipped_note}", "info"),
-            "0",
+            0,
             "",
             "",
             "",
@@ -2358,11 +2852,13 @@ def register_callbacks(app):
         )
 
     @app.callback(
+        # Ordered so the three outputs a progress tick touches come first and
+        # the rest can be covered by _NO_UPDATE_TAIL.
         Output("eval-status", "children", allow_duplicate=True),
-        Output("eval-progress", "value", allow_duplicate=True),
+        Output("eval-progress-store", "data", allow_duplicate=True),
+        Output("eval-runtime-errors", "children", allow_duplicate=True),
         Output("eval-summary", "children", allow_duplicate=True),
         Output("eval-errors", "children", allow_duplicate=True),
-        Output("eval-runtime-errors", "children", allow_duplicate=True),
         Output("eval-graph-overall", "figure", allow_duplicate=True),
         Output("eval-graph-items", "figure", allow_duplicate=True),
         Output("eval-graph-fields", "figure", allow_duplicate=True),
@@ -2375,61 +2871,58 @@ def register_callbacks(app):
     )
     def poll_eval_job(_n, job_id):
         if not job_id:
-            return (
-                no_update,
-                no_update,
-                no_update,
-                no_update,
-                no_update,
-                no_update,
-                no_update,
-                no_update,
-                no_update,
-                no_update,
-                no_update,
-            )
+            return (no_update, no_update, no_update) + _NO_UPDATE_TAIL
         with _EVAL_LOCK:
             info = _EVAL_JOBS.get(job_id)
         if not info:
-            return (
-                no_update,
-                no_update,
-                no_update,
-                no_update,
-                no_update,
-                no_update,
-                no_update,
-                no_update,
-                no_update,
-                no_update,
-                None,
-            )
-        done_steps = info.get("done_steps", 0)
-        total_steps = info.get("total_steps", 1) or 1
+            return _NO_UPDATE_TAIL + (no_update, no_update, None)
+        done_steps = info.done_steps
+        total_steps = info.total_steps or 1
         progress = int(done_steps / total_steps * 100)
-        runtime_errors = _format_runtime_errors(info.get("errors", []))
+        runtime_errors = _format_runtime_errors(info.errors)
         status = _status(
-            f"Progress: {done_steps}/{total_steps} ({info.get('current_method', '')} {info.get('current_sample', '')})",
-            "info" if not info.get("done") else "success",
+            f"Progress: {done_steps}/{total_steps} ({info.current_method} {info.current_sample})",
+            "info" if not info.done else "success",
         )
-        if info.get("done"):
-            results_payload = {
-                "results": info.get("results", {}),
-                "runtime_errors": info.get("errors", []),
-                "plots_path": info.get("plots_path"),
-            }
-            results_json = json.dumps(results_payload, ensure_ascii=False, indent=2)
-            summary = info.get("summary", "")
-            errors_text = info.get("errors_text", "")
-            figures = _build_eval_figures(results_payload.get("results", {}))
+        if info.done:
+            files = {}
+            if info.results_path:
+                files["results"] = info.results_path
+            if info.plots_path:
+                files["plots"] = info.plots_path
+            if files:
+                _EVAL_FILES[job_id] = files
+            if info.results_path:
+                # The full results can be MBs; the store only carries a manifest
+                # and the download callbacks read the file it points at. Stored
+                # as a plain dict so Dash serializes it exactly once and readers
+                # skip a parse.
+                results_json = {
+                    "job_id": job_id if files else None,
+                    "results_path": info.results_path,
+                    "plots_path": info.plots_path,
+                    "runtime_error_count": len(info.errors),
+                }
+            else:
+                # The results file could not be written, and the job is about
+                # to be dropped from _EVAL_JOBS — embed the full payload so
+                # the download button still delivers it.
+                results_json = {
+                    "results": info.results,
+                    "runtime_errors": info.errors,
+                    "plots_path": info.plots_path,
+                }
+            summary = info.summary
+            errors_text = info.errors_text
+            figures = _eval_figures_cached(info.results)
             with _EVAL_LOCK:
                 _EVAL_JOBS.pop(job_id, None)
             return (
                 status,
-                str(progress),
+                progress,
+                runtime_errors,
                 summary,
                 errors_text,
-                runtime_errors,
                 figures["overall"],
                 figures["items"],
                 figures["fields"],
@@ -2437,19 +2930,16 @@ def register_callbacks(app):
                 results_json,
                 None,
             )
-        return (
-            status,
-            str(progress),
-            no_update,
-            no_update,
-            runtime_errors,
-            no_update,
-            no_update,
-            no_update,
-            no_update,
-            no_update,
-            no_update,
-        )
+        return (status, progress, runtime_errors) + _NO_UPDATE_TAIL
+
+    # The server ships the raw percentage; int -> str for the <progress>
+    # element happens in the browser so the formatting never costs a
+    # server roundtrip.
+    app.clientside_callback(
+        "function(p) { return p == null ? window.dash_clientside.no_update : String(p); }",
+        Output("eval-progress", "value"),
+        Input("eval-progress-store", "data"),
+    )
 
     @app.callback(
         Output("download-eval-results", "data"),
@@ -2460,9 +2950,30 @@ def register_callbacks(app):
     def download_eval_results(_n, results_json):
         if not results_json:
             raise PreventUpdate
-        payload = results_json if isinstance(results_json, str) else json.dumps(results_json, ensure_ascii=False, indent=2)
+        manifest = results_json if isinstance(results_json, dict) else None
+        if manifest is None and isinstance(results_json, str):
+            try:
+                manifest = _loads(results_json)
+            except Exception:
+                manifest = None
+        if isinstance(manifest, dict):
+            if manifest.get("job_id") and manifest.get("results_path"):
+                # The clientside callback streams this via /eval-file/.
+                raise PreventUpdate
+            results_path = manifest.get("results_path")
+            if results_path and Path(results_path).exists():
+                return dcc.send_file(results_path, filename="evaluation_results.json")
+        payload = results_json if isinstance(results_json, str) else _dump(results_json)
         return dcc.send_string(payload, filename="evaluation_results.json")
 
+    app.clientside_callback(
+        ClientsideFunction(namespace="evaldl", function_name="navigate"),
+        Output("eval-download-nav", "data"),
+        Input("eval-download-btn", "n_clicks"),
+        State("eval-results-store", "data"),
+        prevent_initial_call=True,
+    )
+
     @app.callback(
         Output("download-eval-plots", "data"),
         Input("eval-download-plots-btn", "n_clicks"),
@@ -2473,6 +2984,12 @@ def register_callbacks(app):
         results = _parse_eval_results(results_json)
         if not results:
             raise PreventUpdate
-        figures = _build_eval_figures(results)
-        html_content = _figures_to_html(figures)
+        # Parse/figure/HTML are pure functions of the results, so repeat
+        # clicks for the same payload reuse the rendered document.
+        key = _payload_key(results)
+
+        def _build() -> str:
+            return _figures_to_html(_eval_figures_cached(results))
+
+        html_content = _export_cached("eval-plots", key, _build)
         return dcc.send_string(html_content, filename="evaluation_plots.html")
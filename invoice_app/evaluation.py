@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import base64
+import functools
 import json
 import os
 import re
@@ -8,13 +9,30 @@ import shutil
 import statistics
 import subprocess
 import tempfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import date, datetime
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 
 from invoice_app.utils import dotted_get, set_dotted
 
+try:  # Optional accelerator; stdlib json stays as the fallback.
+    import orjson
+except ImportError:
+    orjson = None
+
+try:  # Optional accelerator; the per-field regex scan stays as the fallback.
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:  # Optional accelerator for character-histogram similarity.
+    import numpy as np
+except ImportError:
+    np = None
+
 DEFAULT_DATASET_PATH = Path("C:/Users/bukaj/Documents/Bakalarka/gen7")
 
 
@@ -54,6 +72,13 @@ ITEM_FIELD_SPECS: List[FieldSpec] = [
     FieldSpec("line_total", "Line total", "amount"),
 ]
 
+# Pre-split path tuples so per-document hot loops skip the dotted-path
+# string parsing done by dotted_get/set_dotted.
+FIELD_PATH_PARTS: List[Tuple[FieldSpec, Tuple[str, ...]]] = [
+    (spec, tuple(spec.path.split("."))) for spec in FIELD_SPECS
+]
+FIELD_PARTS_BY_PATH: Dict[str, Tuple[str, ...]] = {spec.path: parts for spec, parts in FIELD_PATH_PARTS}
+
 LABEL_MAP: Dict[str, List[str]] = {
     "invoice.number": [
         "invoice number",
@@ -286,19 +311,39 @@ SCHEMA_HINT = {
 }
 
 
+def _loads(raw: Union[str, bytes]) -> Any:
+    """orjson.loads when available (SIMD-accelerated, takes bytes directly),
+    stdlib json otherwise."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+_RE_FENCE_PREFIX = re.compile(r"^```[a-zA-Z0-9]*")
+_RE_JSON_OBJ = re.compile(r"\{.*\}", re.DOTALL)
+_RE_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+def _strip_code_fence(text: str) -> str:
+    text = text.strip()
+    if text.startswith("```"):
+        text = _RE_FENCE_PREFIX.sub("", text).strip()
+        if text.endswith("```"):
+            text = text[:-3].strip()
+    return text
+
+
+
+# Parsed payload per sample file, keyed by path with the file's mtime so
+# edits invalidate the entry. list_dataset_samples runs from UI callbacks and
+# repeatedly re-reads directories that rarely change between calls.
+_SAMPLE_CACHE: Dict[str, Tuple[int, Optional[Dict[str, Any]]]] = {}
+
+
 def list_dataset_samples(dataset_dir: Path) -> List[Dict[str, Any]]:
     samples: List[Dict[str, Any]] = []
     if not dataset_dir.exists():
         return samples
 
-    def _strip_code_fence(text: str) -> str:
-        text = text.strip()
-        if text.startswith("```"):
-            text = re.sub(r"^```[a-zA-Z0-9]*", "", text).strip()
-            if text.endswith("```"):
-                text = text[: -3].strip()
-        return text
-
     def _parse_jsonish(value: Any) -> Any:
         if isinstance(value, (dict, list)):
             return value
@@ -306,39 +351,51 @@ def list_dataset_samples(dataset_dir: Path) -> List[Dict[str, Any]]:
             return value
         cleaned = _strip_code_fence(value)
         try:
-            return json.loads(cleaned)
+            return _loads(cleaned)
         except Exception:
             pass
         match = re.search(r"\{.*\}", cleaned, re.DOTALL)
         if match:
             try:
-                return json.loads(match.group(0))
+                return _loads(match.group(0))
             except Exception:
                 pass
         match = re.search(r"\[.*\]", cleaned, re.DOTALL)
         if match:
             try:
-                return json.loads(match.group(0))
+                return _loads(match.group(0))
             except Exception:
                 pass
         return value
 
     def _find_template_payload(obj: Any) -> Optional[Dict[str, Any]]:
-        if isinstance(obj, dict):
-            if "template" in obj and "data" in obj:
-                return obj
-            for val in obj.values():
-                found = _find_template_payload(val)
-                if found is not None:
-                    return found
-        elif isinstance(obj, list):
-            for val in obj:
-                found = _find_template_payload(val)
-                if found is not None:
-                    return found
+        # Explicit-stack depth-first search; children are pushed reversed so
+        # the visit order (and thus which pair wins) matches the old
+        # recursive version without per-node call overhead.
+        stack = [obj]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, dict):
+                if "template" in node and "data" in node:
+                    return node
+                stack.extend(reversed(list(node.values())))
+            elif isinstance(node, list):
+                stack.extend(reversed(node))
         return None
 
     def _coerce_payload(raw: Any) -> Optional[Dict[str, Any]]:
+        if isinstance(raw, dict):
+            template = raw.get("template")
+            data = raw.get("data")
+            if (
+                isinstance(template, dict)
+                and isinstance(data, dict)
+                and "template" not in template
+                and "template" not in data
+            ):
+                # Well-formed sample: nothing to re-parse and no nested
+                # payload for _find_template_payload to dig out.
+                return {"template": template, "data": data}
         found = _find_template_payload(raw)
         if found is None:
             return None
@@ -354,35 +411,63 @@ def list_dataset_samples(dataset_dir: Path) -> List[Dict[str, Any]]:
             return None
         return {"template": template, "data": data}
 
-    for json_path in dataset_dir.glob("*.json"):
-        name = json_path.name
-        if name.endswith(".ocr.json") or name.startswith("llm_response_raw_") or name.endswith("_failed.json"):
-            continue
+    def _load_sample(json_path: Path) -> Optional[Dict[str, Any]]:
         try:
-            raw = json.loads(json_path.read_text(encoding="utf-8"))
-        except Exception:
-            continue
-        payload = _coerce_payload(raw)
+            mtime = json_path.stat().st_mtime_ns
+        except OSError:
+            return None
+        cache_key = str(json_path)
+        cached = _SAMPLE_CACHE.get(cache_key)
+        if cached is not None and cached[0] == mtime:
+            payload = cached[1]
+        else:
+            try:
+                # read_bytes + _loads skips the str round trip entirely when
+                # orjson is handling the decode.
+                raw = _loads(json_path.read_bytes())
+            except Exception:
+                payload = None
+            else:
+                payload = _coerce_payload(raw)
+            _SAMPLE_CACHE[cache_key] = (mtime, payload)
         if payload is None:
-            continue
+            return None
         base = json_path.stem
         pdf_path = json_path.with_suffix(".pdf")
         ocr_path = json_path.with_name(f"{base}.ocr.json")
         if not pdf_path.exists() or not ocr_path.exists():
-            continue
+            return None
         template = payload.get("template", {}) if isinstance(payload.get("template", {}), dict) else {}
         visible_paths, items_visible = collect_visible_paths(template)
-        samples.append(
-            {
-                "id": base,
-                "data": payload.get("data", {}),
-                "template": template,
-                "visible_paths": visible_paths,
-                "items_visible": items_visible,
-                "pdf_path": pdf_path,
-                "ocr_path": ocr_path,
-            }
+        return {
+            "id": base,
+            "data": payload.get("data", {}),
+            "template": template,
+            "visible_paths": visible_paths,
+            "items_visible": items_visible,
+            "pdf_path": pdf_path,
+            "ocr_path": ocr_path,
+        }
+
+    paths = [
+        json_path
+        for json_path in dataset_dir.glob("*.json")
+        if not (
+            json_path.name.endswith(".ocr.json")
+            or json_path.name.startswith("llm_response_raw_")
+            or json_path.name.endswith("_failed.json")
         )
+    ]
+    if not paths:
+        return samples
+    if len(paths) == 1:
+        results = [_load_sample(paths[0])]
+    else:
+        # The per-file work is dominated by read_text/stat syscalls, which
+        # release the GIL, so a thread pool overlaps the disk latency.
+        with ThreadPoolExecutor(max_workers=min(16, len(paths))) as pool:
+            results = list(pool.map(_load_sample, paths))
+    samples = [sample for sample in results if sample is not None]
     return sorted(samples, key=lambda s: s["id"])
 
 
@@ -398,17 +483,24 @@ def get_engine_availability() -> Dict[str, bool]:
     return availability
 
 
+_NON_WORD_RE = re.compile(r"[^\w\s]")
+
+
 def _normalize_text(value: Any) -> str:
     if value is None:
         return ""
-    text = str(value).strip().lower()
-    text = re.sub(r"\s+", " ", text)
-    text = re.sub(r"[^\w\s]", "", text)
+    # " ".join(split()) strips and collapses whitespace in one C pass,
+    # without the regex machinery.
+    text = " ".join(str(value).lower().split())
+    text = _NON_WORD_RE.sub("", text)
     return text.strip()
 
 
-def _tokenize(text: str) -> List[str]:
-    return re.findall(r"[a-z0-9]+", text.lower())
+@functools.lru_cache(maxsize=4096)
+def _tokenize(text: str) -> Tuple[str, ...]:
+    """Tokenize text; cached because the same labels, field values and
+    key-column strings are tokenized repeatedly across similarity calls."""
+    return tuple(re.findall(r"[a-z0-9]+", text.lower()))
 
 
 def _token_f1(gt: str, pred: str) -> float:
@@ -418,17 +510,11 @@ def _token_f1(gt: str, pred: str) -> float:
         return 1.0
     if not gt_tokens or not pred_tokens:
         return 0.0
-    gt_counts: Dict[str, int] = {}
-    pred_counts: Dict[str, int] = {}
-    for tok in gt_tokens:
-        gt_counts[tok] = gt_counts.get(tok, 0) + 1
-    for tok in pred_tokens:
-        pred_counts[tok] = pred_counts.get(tok, 0) + 1
-    overlap = 0
-    for tok, cnt in gt_counts.items():
-        overlap += min(cnt, pred_counts.get(tok, 0))
-    precision = overlap / len(pred_tokens) if pred_tokens else 0.0
-    recall = overlap / len(gt_tokens) if gt_tokens else 0.0
+    # Counter's C-level intersection walks the smaller multiset once,
+    # replacing the hand-rolled dict counting loops.
+    overlap = sum((Counter(gt_tokens) & Counter(pred_tokens)).values())
+    precision = overlap / len(pred_tokens)
+    recall = overlap / len(gt_tokens)
     if precision + recall == 0:
         return 0.0
     return 2 * precision * recall / (precision + recall)
@@ -449,14 +535,23 @@ def _char_similarity(gt: str, pred: str) -> float:
         return 1.0
     if not gt or not pred:
         return 0.0
-    try:
-        from collections import Counter
-
-        common = sum((Counter(gt) & Counter(pred)).values())
+    if np is not None and gt.isascii() and pred.isascii():
+        # Vectorized byte histograms; for ASCII text bytes and characters
+        # coincide, so the score matches the Counter path exactly.
+        ha = np.bincount(np.frombuffer(gt.encode("ascii"), dtype=np.uint8), minlength=256)
+        hb = np.bincount(np.frombuffer(pred.encode("ascii"), dtype=np.uint8), minlength=256)
+        common = int(np.minimum(ha, hb).sum())
         if common:
             return common / max(len(gt), len(pred))
-    except Exception:
-        pass
+    else:
+        try:
+            from collections import Counter
+
+            common = sum((Counter(gt) & Counter(pred)).values())
+            if common:
+                return common / max(len(gt), len(pred))
+        except Exception:
+            pass
     try:
         import difflib
 
@@ -491,12 +586,28 @@ def _parse_number(value: Any) -> Optional[float]:
         return None
 
 
+# Canonical zero-padded dates, either year-first or day-first with a
+# consistent separator; anything else goes through the strptime loop.
+DATE_PARSE_RE = re.compile(r"^(?:(\d{4})([-/])(\d{2})\2(\d{2})|(\d{2})([./-])(\d{2})\6(\d{4}))$")
+
+
 def _parse_date(value: Any) -> Optional[date]:
     if value is None:
         return None
     text = str(value).strip()
     if not text:
         return None
+    match = DATE_PARSE_RE.match(text)
+    if match:
+        try:
+            if match.group(1):
+                return date(int(match.group(1)), int(match.group(3)), int(match.group(4)))
+            # Day-first, matching the %d.%m.%Y family tried first below.
+            return date(int(match.group(8)), int(match.group(7)), int(match.group(5)))
+        except ValueError:
+            # Not a valid calendar date under this reading (e.g. month 13);
+            # the format loop and its disambiguation handle those.
+            pass
     for fmt in ("%Y-%m-%d", "%Y/%m/%d", "%d.%m.%Y", "%d/%m/%Y", "%d-%m-%Y", "%m/%d/%Y"):
         try:
             return datetime.strptime(text, fmt).date()
@@ -520,17 +631,30 @@ def _parse_date(value: Any) -> Optional[date]:
     return None
 
 
-def _extract_lines(text: str) -> List[str]:
-    lines = []
+def _prepare_lines(text: str) -> Tuple[List[str], List[str]]:
+    """Split text into cleaned lines plus their lowercased forms, in one pass.
+
+    Lines are whitespace-collapsed and stripped here, so the lowercased form
+    is exactly what _normalize_label_line would produce; the extractors index
+    into the norms list instead of re-normalizing each line per use.
+    """
+    lines: List[str] = []
+    norms: List[str] = []
     for line in text.splitlines():
-        cleaned = re.sub(r"\s+", " ", line).strip()
+        cleaned = " ".join(line.split())
         if cleaned:
             lines.append(cleaned)
-    return lines
+            norms.append(cleaned.lower())
+    return lines, norms
 
 
+def _extract_lines(text: str) -> List[str]:
+    return _prepare_lines(text)[0]
+
+
+@functools.lru_cache(maxsize=4096)
 def _normalize_label_line(line: str) -> str:
-    cleaned = re.sub(r"\s+", " ", line).strip().lower()
+    cleaned = " ".join(line.split()).lower()
     return cleaned
 
 
@@ -541,6 +665,74 @@ LABEL_NORMALIZED = {
     if label and str(label).strip()
 }
 
+# Deduplicated labels per field path, longest first so e.g. "invoice number"
+# wins over "invoice"; computed once instead of per _extract_label_value call.
+LABEL_LIST_SORTED: Dict[str, List[str]] = {
+    path: sorted({str(label).strip() for label in labels if label and str(label).strip()}, key=len, reverse=True)
+    for path, labels in LABEL_MAP.items()
+}
+
+# One compiled alternation per field path, built from the pre-sorted lists.
+LABEL_REGEX: Dict[str, re.Pattern] = {
+    path: re.compile("|".join(re.escape(label) for label in label_list), re.IGNORECASE)
+    for path, label_list in LABEL_LIST_SORTED.items()
+    if label_list
+}
+
+# Normalized label + token set per field path, so kv_extract's fuzzy match
+# compares plain sets instead of re-tokenizing ~150 static labels per line.
+LABEL_TOKEN_SETS: Dict[str, List[Tuple[str, frozenset]]] = {
+    path: [
+        (str(label).lower().strip(), frozenset(_tokenize(str(label))))
+        for label in labels
+        if label and str(label).strip()
+    ]
+    for path, labels in LABEL_MAP.items()
+}
+
+
+def _build_label_automaton():
+    """Build one Aho-Corasick automaton over every label, tagged with its path.
+
+    A single pass over a lowercased line then reports which field paths have
+    a label on it, replacing one alternation scan per FieldSpec. Returns None
+    when pyahocorasick is not installed.
+    """
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for path, labels in LABEL_MAP.items():
+        for label in labels:
+            cleaned = str(label).strip().lower()
+            if cleaned:
+                automaton.add_word(cleaned, (path, cleaned))
+    automaton.make_automaton()
+    return automaton
+
+
+LABEL_AUTOMATON = _build_label_automaton()
+
+
+def _label_hit_lines(lines: List[str], norms: Optional[List[str]] = None) -> Optional[Dict[str, List[int]]]:
+    """Map field path -> indices of lines containing one of its labels.
+
+    One linear pass over the document instead of one alternation scan per
+    field; returns None when the automaton is unavailable so callers fall
+    back to scanning every line per field.
+    """
+    if LABEL_AUTOMATON is None:
+        return None
+    if norms is None:
+        norms = [line.lower() for line in lines]
+    hits: Dict[str, List[int]] = {}
+    for idx, norm in enumerate(norms):
+        seen: set[str] = set()
+        for _end, (path, _label) in LABEL_AUTOMATON.iter(norm):
+            if path not in seen:
+                seen.add(path)
+                hits.setdefault(path, []).append(idx)
+    return hits
+
 
 def _looks_like_label(line: str) -> bool:
     norm = _normalize_label_line(line)
@@ -624,23 +816,64 @@ SECTION_STOP_HEADERS = [
 ]
 
 
-def _find_item_table_start(lines: List[str]) -> Optional[int]:
+def _build_item_header_automaton():
+    """One automaton over the item/section header keywords, tagged by category."""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    groups = (
+        ("desc", ITEM_DESC_HEADERS),
+        ("qty", ITEM_QTY_HEADERS),
+        ("unit", ITEM_UNIT_HEADERS),
+        ("total", ITEM_TOTAL_HEADERS),
+        ("stop", SECTION_STOP_HEADERS),
+    )
+    for category, headers in groups:
+        for header in headers:
+            automaton.add_word(header, category)
+    automaton.make_automaton()
+    return automaton
+
+
+ITEM_HEADER_AC = _build_item_header_automaton()
+
+
+def _line_header_flags(norm: str) -> Tuple[bool, bool, bool, bool, bool]:
+    """(desc, qty, unit, total, stop) header hits for one normalized line."""
+    if ITEM_HEADER_AC is not None:
+        cats = {category for _end, category in ITEM_HEADER_AC.iter(norm)}
+        return ("desc" in cats, "qty" in cats, "unit" in cats, "total" in cats, "stop" in cats)
+    return (
+        any(key in norm for key in ITEM_DESC_HEADERS),
+        any(key in norm for key in ITEM_QTY_HEADERS),
+        any(key in norm for key in ITEM_UNIT_HEADERS),
+        any(key in norm for key in ITEM_TOTAL_HEADERS),
+        any(key in norm for key in SECTION_STOP_HEADERS),
+    )
+
+
+def _find_item_table_start(lines: List[str], line_flags: Optional[List[Tuple[bool, ...]]] = None) -> Optional[int]:
     window = 6
+    # Each line's header categories are computed once up front; the old
+    # per-window rescans normalized and substring-searched every line up to
+    # six times.
+    if line_flags is None:
+        line_flags = [_line_header_flags(_normalize_label_line(line)) for line in lines]
     for idx in range(len(lines)):
         end = idx
         found_desc = found_qty = found_unit = found_total = False
-        for offset, line in enumerate(lines[idx : idx + window]):
-            norm = _normalize_label_line(line)
-            if any(key in norm for key in ITEM_DESC_HEADERS):
+        for offset in range(min(window, len(lines) - idx)):
+            desc, qty, unit, total, _stop = line_flags[idx + offset]
+            if desc:
                 found_desc = True
                 end = idx + offset
-            if any(key in norm for key in ITEM_QTY_HEADERS):
+            if qty:
                 found_qty = True
                 end = idx + offset
-            if any(key in norm for key in ITEM_UNIT_HEADERS):
+            if unit:
                 found_unit = True
                 end = idx + offset
-            if any(key in norm for key in ITEM_TOTAL_HEADERS):
+            if total:
                 found_total = True
                 end = idx + offset
         if found_desc and found_qty and found_unit and found_total:
@@ -648,20 +881,23 @@ def _find_item_table_start(lines: List[str]) -> Optional[int]:
     return None
 
 
-def extract_items_from_lines(lines: List[str]) -> List[Dict[str, Any]]:
+def extract_items_from_lines(lines: List[str], norms: Optional[List[str]] = None) -> List[Dict[str, Any]]:
     if not lines:
         return []
-    start = _find_item_table_start(lines)
+    if norms is None:
+        norms = [_normalize_label_line(line) for line in lines]
+    line_flags = [_line_header_flags(norm) for norm in norms]
+    start = _find_item_table_start(lines, line_flags)
     if start is None:
         return []
     items: List[Dict[str, Any]] = []
     idx = start
     while idx + 3 < len(lines):
         line = lines[idx].strip()
-        norm = _normalize_label_line(line)
-        if any(key in norm for key in SECTION_STOP_HEADERS):
+        desc, _qty, _unit, _total, stop = line_flags[idx]
+        if stop:
             break
-        if any(key in norm for key in ITEM_DESC_HEADERS):
+        if desc:
             idx += 1
             continue
         if _parse_number(line) is not None:
@@ -729,14 +965,22 @@ def collect_visible_paths(template: Dict[str, Any]) -> Tuple[set[str], bool]:
     return visible, items_visible
 
 
-def _extract_label_value(lines: List[str], labels: Iterable[str]) -> str:
-    if not lines or not labels:
-        return ""
-    label_list = sorted({label.strip() for label in labels if label and str(label).strip()}, key=len, reverse=True)
-    if not label_list:
+def _extract_label_value(
+    lines: List[str],
+    path: str,
+    candidate_idxs: Optional[Iterable[int]] = None,
+    norms: Optional[List[str]] = None,
+) -> str:
+    label_regex = LABEL_REGEX.get(path)
+    if not lines or label_regex is None:
         return ""
-    label_regex = re.compile("|".join(re.escape(label) for label in label_list), re.IGNORECASE)
-    for idx, line in enumerate(lines):
+    # candidate_idxs (from _label_hit_lines) narrows the scan to lines known
+    # to contain a label; lines without a hit would fail the search anyway.
+    # norms (from _prepare_lines) carries each line's normalized form.
+    if candidate_idxs is None:
+        candidate_idxs = range(len(lines))
+    for idx in candidate_idxs:
+        line = lines[idx]
         match = label_regex.search(line)
         if not match:
             continue
@@ -746,13 +990,14 @@ def _extract_label_value(lines: List[str], labels: Iterable[str]) -> str:
             after = parts[1].strip(" -#") if len(parts) > 1 else ""
             if after:
                 return after
-        line_norm = _normalize_label_line(line)
+        line_norm = norms[idx] if norms is not None else _normalize_label_line(line)
         matched_norm = _normalize_label_line(matched)
         if line_norm == matched_norm:
             if idx + 1 < len(lines):
                 next_line = lines[idx + 1].strip()
                 if next_line and not label_regex.search(next_line):
-                    if _normalize_label_line(next_line) in SUBLABEL_SKIP and idx + 2 < len(lines):
+                    next_norm = norms[idx + 1] if norms is not None else _normalize_label_line(next_line)
+                    if next_norm in SUBLABEL_SKIP and idx + 2 < len(lines):
                         return lines[idx + 2].strip()
                     return next_line
             continue
@@ -767,14 +1012,41 @@ def _extract_label_value(lines: List[str], labels: Iterable[str]) -> str:
         if idx + 1 < len(lines):
             next_line = lines[idx + 1].strip()
             if next_line and not label_regex.search(next_line):
-                if _normalize_label_line(next_line) in SUBLABEL_SKIP and idx + 2 < len(lines):
+                next_norm = norms[idx + 1] if norms is not None else _normalize_label_line(next_line)
+                if next_norm in SUBLABEL_SKIP and idx + 2 < len(lines):
                     return lines[idx + 2].strip()
                 return next_line
     return ""
 
 
-def regex_extract(text: str) -> Dict[str, Any]:
-    lines = _extract_lines(text or "")
+def _get_by_parts(data: Any, parts: Tuple[str, ...]) -> Any:
+    """dotted_get over a pre-split FIELD_SPECS path (dict keys only)."""
+    node = data
+    for part in parts:
+        if isinstance(node, dict) and part in node:
+            node = node[part]
+        else:
+            return ""
+    return node
+
+
+def _set_by_parts(data: Dict[str, Any], parts: Tuple[str, ...], value: Any) -> None:
+    """set_dotted over a pre-split FIELD_SPECS path (dict keys only)."""
+    node: Any = data
+    for part in parts[:-1]:
+        if not isinstance(node, dict):
+            return
+        nxt = node.get(part)
+        if not isinstance(nxt, (dict, list)):
+            nxt = {}
+            node[part] = nxt
+        node = nxt
+    if isinstance(node, dict):
+        node[parts[-1]] = value
+
+
+def regex_extract(text: str, _prepared: Optional[Tuple[List[str], List[str]]] = None) -> Dict[str, Any]:
+    lines, norms = _prepared if _prepared is not None else _prepare_lines(text or "")
     result: Dict[str, Any] = {
         "invoice": {},
         "seller": {},
@@ -784,35 +1056,37 @@ def regex_extract(text: str) -> Dict[str, Any]:
         "payment": {},
         "notes": "",
     }
-    for spec in FIELD_SPECS:
-        labels = LABEL_MAP.get(spec.path, [])
-        value = _extract_label_value(lines, labels)
+    label_hits = _label_hit_lines(lines, norms)
+    for spec, parts in FIELD_PATH_PARTS:
+        candidates = label_hits.get(spec.path, ()) if label_hits is not None else None
+        value = _extract_label_value(lines, spec.path, candidates, norms)
         if spec.path == "notes" and not value:
-            for line in lines:
-                if "note" in line.lower():
-                    value = line
+            for idx, norm in enumerate(norms):
+                if "note" in norm:
+                    value = lines[idx]
                     break
         if value:
-            set_dotted(result, spec.path, value)
+            _set_by_parts(result, parts, value)
 
     # Simple fallback for totals using amount regex
     amount_regex = re.compile(r"([0-9]+(?:[.,][0-9]{2})?)")
     for key in ("totals.subtotal", "totals.tax", "totals.due"):
-        if dotted_get(result, key):
+        parts = FIELD_PARTS_BY_PATH[key]
+        if _get_by_parts(result, parts):
             continue
-        labels = LABEL_MAP.get(key, [])
-        value = _extract_label_value(lines, labels)
+        candidates = label_hits.get(key, ()) if label_hits is not None else None
+        value = _extract_label_value(lines, key, candidates, norms)
         if value:
             match = amount_regex.search(value)
             if match:
-                set_dotted(result, key, match.group(1))
+                _set_by_parts(result, parts, match.group(1))
     if not result.get("items"):
-        result["items"] = extract_items_from_lines(lines)
+        result["items"] = extract_items_from_lines(lines, norms)
     return result
 
 
-def kv_extract(text: str) -> Dict[str, Any]:
-    lines = _extract_lines(text or "")
+def kv_extract(text: str, _prepared: Optional[Tuple[List[str], List[str]]] = None) -> Dict[str, Any]:
+    lines, norms = _prepared if _prepared is not None else _prepare_lines(text or "")
     result: Dict[str, Any] = {
         "invoice": {},
         "seller": {},
@@ -834,94 +1108,141 @@ def kv_extract(text: str) -> Dict[str, Any]:
             left = line
             right = ""
         left_norm = _normalize_label_line(left)
+        left_tokens = frozenset(_tokenize(left_norm))
         right = right.strip()
         best_path = None
         best_score = 0.0
-        for path, labels in LABEL_MAP.items():
-            for label in labels:
-                label_norm = label.lower().strip()
-                if label_norm and label_norm in left_norm:
+        for path, label_entries in LABEL_TOKEN_SETS.items():
+            for label_norm, label_tokens in label_entries:
+                if label_norm in left_norm:
                     score = 1.0
+                elif left_tokens and label_tokens:
+                    inter = len(left_tokens & label_tokens)
+                    score = inter / len(left_tokens | label_tokens) if inter else 0.0
                 else:
-                    score = _token_jaccard(left_norm, label_norm)
+                    score = 0.0
                 if score > best_score:
                     best_score = score
                     best_path = path
-        if best_path and best_score >= 0.8 and not dotted_get(result, best_path):
-            if right:
-                set_dotted(result, best_path, right)
-            elif idx + 1 < len(lines):
-                next_line = lines[idx + 1].strip()
-                if next_line and not _looks_like_label(next_line):
-                    set_dotted(result, best_path, next_line)
+        if best_path and best_score >= 0.8:
+            parts = FIELD_PARTS_BY_PATH[best_path]
+            if not _get_by_parts(result, parts):
+                if right:
+                    _set_by_parts(result, parts, right)
+                elif idx + 1 < len(lines):
+                    next_line = lines[idx + 1].strip()
+                    next_norm = norms[idx + 1]
+                    if next_line and next_norm not in LABEL_NORMALIZED and next_norm not in SUBLABEL_SKIP:
+                        _set_by_parts(result, parts, next_line)
 
     if not result.get("items"):
-        result["items"] = extract_items_from_lines(lines)
+        result["items"] = extract_items_from_lines(lines, norms)
     return result
 
 
-def pattern_extract(text: str) -> Dict[str, Any]:
-    result = regex_extract(text)
-    lines = _extract_lines(text or "")
+IBAN_RE = re.compile(r"\b[A-Z]{2}\d{2}[A-Z0-9]{10,30}\b")
+EMAIL_RE = re.compile(r"[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}", re.IGNORECASE)
+PHONE_RE = re.compile(r"\+?\d[\d\s().-]{6,}\d")
+PHONE_SEP_CHARS = frozenset("+().- \t\n\r\x0b\x0c")
+DATE_RE = re.compile(r"\d{4}[-/]\d{2}[-/]\d{2}|\d{1,2}[./-]\d{1,2}[./-]\d{4}")
+INV_CANDIDATE_RE = re.compile(r"\b[A-Z0-9][A-Z0-9-]{5,}\b")
+
+
+def pattern_extract(
+    text: str,
+    _prepared: Optional[Tuple[List[str], List[str]]] = None,
+    _prebuilt: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    lines, norms = _prepared if _prepared is not None else _prepare_lines(text or "")
+    # _prebuilt lets ensemble_extract reuse its regex_extract result instead
+    # of running the label extraction twice; the caller owns the copy.
+    result = _prebuilt if _prebuilt is not None else regex_extract(text, (lines, norms))
     text_blob = " ".join(lines)
-    if not dotted_get(result, "payment.iban"):
-        iban_match = re.search(r"\b[A-Z]{2}\d{2}[A-Z0-9]{10,30}\b", text_blob)
+    if not _get_by_parts(result, FIELD_PARTS_BY_PATH["payment.iban"]):
+        iban_match = IBAN_RE.search(text_blob)
         if iban_match:
-            set_dotted(result, "payment.iban", iban_match.group(0))
-    emails = re.findall(r"[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}", text_blob, flags=re.IGNORECASE)
-    if emails:
-        if not dotted_get(result, "seller.email"):
-            set_dotted(result, "seller.email", emails[0])
-        if len(emails) > 1 and not dotted_get(result, "client.email"):
-            set_dotted(result, "client.email", emails[1])
-    phones = re.findall(r"\+?\d[\d\s().-]{6,}\d", text_blob)
-    filtered_phones = []
-    for phone in phones:
-        digits = re.findall(r"\d", phone)
-        if len(digits) < 7:
-            continue
-        if not re.search(r"[+\s().-]", phone):
-            continue
-        filtered_phones.append(phone)
-    if filtered_phones:
-        if not dotted_get(result, "seller.contact"):
-            set_dotted(result, "seller.contact", filtered_phones[0].strip())
-        if len(filtered_phones) > 1 and not dotted_get(result, "client.contact"):
-            set_dotted(result, "client.contact", filtered_phones[1].strip())
-    dates = re.findall(r"\d{4}[-/]\d{2}[-/]\d{2}|\d{1,2}[./-]\d{1,2}[./-]\d{4}", text_blob)
-    if dates:
-        parsed_dates = []
-        for d in dates:
-            parsed = _parse_date(d)
-            if parsed:
-                parsed_dates.append((parsed, d))
-        parsed_dates.sort()
-        if parsed_dates and not dotted_get(result, "invoice.date"):
-            set_dotted(result, "invoice.date", parsed_dates[0][1])
-        if len(parsed_dates) > 1 and not dotted_get(result, "invoice.due_date"):
-            set_dotted(result, "invoice.due_date", parsed_dates[-1][1])
-    if not dotted_get(result, "invoice.number"):
-        inv_candidates = re.findall(r"\b[A-Z0-9][A-Z0-9-]{5,}\b", text_blob.upper())
+            _set_by_parts(result, FIELD_PARTS_BY_PATH["payment.iban"], iban_match.group(0))
+    # Each blob scan only runs while the fields it can fill are still empty,
+    # so documents the label pass already covered skip the full-text regexes.
+    if not _get_by_parts(result, FIELD_PARTS_BY_PATH["seller.email"]) or not _get_by_parts(result, FIELD_PARTS_BY_PATH["client.email"]):
+        emails = EMAIL_RE.findall(text_blob)
+        if emails:
+            if not _get_by_parts(result, FIELD_PARTS_BY_PATH["seller.email"]):
+                _set_by_parts(result, FIELD_PARTS_BY_PATH["seller.email"], emails[0])
+            if len(emails) > 1 and not _get_by_parts(result, FIELD_PARTS_BY_PATH["client.email"]):
+                _set_by_parts(result, FIELD_PARTS_BY_PATH["client.email"], emails[1])
+    if not _get_by_parts(result, FIELD_PARTS_BY_PATH["seller.contact"]) or not _get_by_parts(result, FIELD_PARTS_BY_PATH["client.contact"]):
+        filtered_phones = []
+        for phone in PHONE_RE.findall(text_blob):
+            # One pass per candidate instead of two more regex scans; every
+            # character the phone pattern admits is either a digit or one of
+            # the separator characters.
+            digits = 0
+            has_sep = False
+            for ch in phone:
+                if ch.isdigit():
+                    digits += 1
+                elif ch in PHONE_SEP_CHARS:
+                    has_sep = True
+            if digits >= 7 and has_sep:
+                filtered_phones.append(phone)
+        if filtered_phones:
+            if not _get_by_parts(result, FIELD_PARTS_BY_PATH["seller.contact"]):
+                _set_by_parts(result, FIELD_PARTS_BY_PATH["seller.contact"], filtered_phones[0].strip())
+            if len(filtered_phones) > 1 and not _get_by_parts(result, FIELD_PARTS_BY_PATH["client.contact"]):
+                _set_by_parts(result, FIELD_PARTS_BY_PATH["client.contact"], filtered_phones[1].strip())
+    if not _get_by_parts(result, FIELD_PARTS_BY_PATH["invoice.date"]) or not _get_by_parts(result, FIELD_PARTS_BY_PATH["invoice.due_date"]):
+        dates = DATE_RE.findall(text_blob)
+        if dates:
+            parsed_dates = []
+            for d in dates:
+                parsed = _parse_date(d)
+                if parsed:
+                    parsed_dates.append((parsed, d))
+            parsed_dates.sort()
+            if parsed_dates and not _get_by_parts(result, FIELD_PARTS_BY_PATH["invoice.date"]):
+                _set_by_parts(result, FIELD_PARTS_BY_PATH["invoice.date"], parsed_dates[0][1])
+            if len(parsed_dates) > 1 and not _get_by_parts(result, FIELD_PARTS_BY_PATH["invoice.due_date"]):
+                _set_by_parts(result, FIELD_PARTS_BY_PATH["invoice.due_date"], parsed_dates[-1][1])
+    if not _get_by_parts(result, FIELD_PARTS_BY_PATH["invoice.number"]):
+        inv_candidates = INV_CANDIDATE_RE.findall(text_blob.upper())
         for token in inv_candidates:
             if token.startswith(("INV", "RE", "FAK", "DE-", "CZ-", "SK-")) or "INV" in token:
-                set_dotted(result, "invoice.number", token)
+                _set_by_parts(result, FIELD_PARTS_BY_PATH["invoice.number"], token)
                 break
     if not result.get("items"):
-        result["items"] = extract_items_from_lines(lines)
+        result["items"] = extract_items_from_lines(lines, norms)
     return result
 
 
+def _clone_for_merge(primary: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy just the spine merge_missing_fields may write into.
+
+    set_dotted only assigns leaves under the top-level sections (and
+    replaces "items" wholesale), so copying the top dict plus one level of
+    dict/list values is enough; deeper values are immutable or replaced,
+    never mutated. Avoids the JSON round-trip deep copy per call.
+    """
+    merged = dict(primary)
+    for key, value in merged.items():
+        if isinstance(value, dict):
+            merged[key] = dict(value)
+        elif isinstance(value, list):
+            merged[key] = list(value)
+    return merged
+
+
 def merge_missing_fields(primary: Dict[str, Any], fallback: Dict[str, Any]) -> Dict[str, Any]:
     if not isinstance(primary, dict):
         primary = {}
     if not isinstance(fallback, dict):
         fallback = {}
-    merged = json.loads(json.dumps(primary))
-    for spec in FIELD_SPECS:
-        if not dotted_get(merged, spec.path):
-            value = dotted_get(fallback, spec.path)
+    merged = _clone_for_merge(primary)
+    for _spec, parts in FIELD_PATH_PARTS:
+        if not _get_by_parts(merged, parts):
+            value = _get_by_parts(fallback, parts)
             if value not in (None, "", []):
-                set_dotted(merged, spec.path, value)
+                _set_by_parts(merged, parts, value)
     if not merged.get("items"):
         items = fallback.get("items", [])
         if items:
@@ -930,9 +1251,12 @@ def merge_missing_fields(primary: Dict[str, Any], fallback: Dict[str, Any]) -> D
 
 
 def ensemble_extract(text: str) -> Dict[str, Any]:
-    regex = regex_extract(text)
-    kv = kv_extract(text)
-    pattern = pattern_extract(text)
+    prepared = _prepare_lines(text or "")
+    regex = regex_extract(text, prepared)
+    kv = kv_extract(text, prepared)
+    # pattern_extract builds on the regex result; hand it a spine copy so the
+    # label extraction runs once per document instead of twice.
+    pattern = pattern_extract(text, prepared, _prebuilt=_clone_for_merge(regex))
     merged = merge_missing_fields(pattern, kv)
     merged = merge_missing_fields(merged, regex)
     candidates = [regex.get("items", []), kv.get("items", []), pattern.get("items", [])]
@@ -961,7 +1285,7 @@ def extract_text_from_ocr_json(ocr_path: Path) -> str:
     if not ocr_path.exists():
         return ""
     try:
-        data = json.loads(ocr_path.read_text(encoding="utf-8"))
+        data = _loads(ocr_path.read_bytes())
     except Exception:
         return ""
     items = data.get("items") if isinstance(data, dict) else data
@@ -1014,24 +1338,32 @@ def extract_text_tesseract(pdf_path: Path) -> str:
         raise RuntimeError("tesseract binary not found in PATH.")
     tesseract_langs = os.environ.get("TESSERACT_LANGS", "").strip()
     pages = _pdf_pages_to_images(pdf_path)
-    texts: List[str] = []
-    for img_bytes in pages:
-        with tempfile.TemporaryDirectory() as tmpdir:
-            img_path = Path(tmpdir) / "page.png"
-            img_path.write_bytes(img_bytes)
-            try:
-                cmd = [tesseract_cmd, str(img_path), "stdout", "--oem", "1"]
-                if tesseract_langs:
-                    cmd.extend(["-l", tesseract_langs])
-                result = subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    text=True,
-                    check=True,
-                )
-            except subprocess.CalledProcessError as exc:
-                raise RuntimeError(f"tesseract failed: {exc.stderr}") from exc
-            texts.append(result.stdout or "")
+    def _ocr_page(img_bytes: bytes) -> str:
+        # Tesseract accepts "stdin" as the input filename, so the PNG can be
+        # piped directly instead of round-tripping through a temp file.
+        cmd = [tesseract_cmd, "stdin", "stdout", "--oem", "1"]
+        if tesseract_langs:
+            cmd.extend(["-l", tesseract_langs])
+        try:
+            result = subprocess.run(
+                cmd,
+                input=img_bytes,
+                capture_output=True,
+                check=True,
+            )
+        except subprocess.CalledProcessError as exc:
+            stderr = (exc.stderr or b"").decode("utf-8", errors="replace")
+            raise RuntimeError(f"tesseract failed: {stderr}") from exc
+        return result.stdout.decode("utf-8", errors="replace") if result.stdout else ""
+
+    if len(pages) <= 1:
+        texts = [_ocr_page(img_bytes) for img_bytes in pages]
+    else:
+        # Pages are independent OCR jobs and the subprocess wait releases
+        # the GIL, so a small thread pool runs them concurrently; map
+        # preserves page order.
+        with ThreadPoolExecutor(max_workers=min(os.cpu_count() or 1, 4)) as pool:
+            texts = list(pool.map(_ocr_page, pages))
     return "\n".join(texts)
 
 
@@ -1042,14 +1374,22 @@ def extract_text_easyocr(pdf_path: Path) -> str:
         raise RuntimeError("easyocr is not installed.") from exc
     pages = _pdf_pages_to_images(pdf_path)
     reader = easyocr.Reader(["en"], gpu=False)
-    chunks: List[str] = []
-    for img_bytes in pages:
+
+    def _ocr_page(img_bytes: bytes) -> str:
         with tempfile.TemporaryDirectory() as tmpdir:
             img_path = Path(tmpdir) / "page.png"
             img_path.write_bytes(img_bytes)
             results = reader.readtext(str(img_path))
-        page_text = " ".join([r[1] for r in results if len(r) > 1])
-        chunks.append(page_text)
+        return " ".join([r[1] for r in results if len(r) > 1])
+
+    if len(pages) <= 1:
+        chunks = [_ocr_page(img_bytes) for img_bytes in pages]
+    else:
+        # One shared reader across a small thread pool: the Torch kernels
+        # release the GIL during inference, and reloading the model per
+        # worker would cost far more than it saves.
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            chunks = list(pool.map(_ocr_page, pages))
     return "\n".join(chunks)
 
 
@@ -1081,14 +1421,6 @@ def is_claude_model(model: str) -> bool:
 
 
 def _parse_llm_json(content: str) -> Any:
-    def _strip_code_fence(txt: str) -> str:
-        txt = txt.strip()
-        if txt.startswith("```"):
-            txt = re.sub(r"^```[a-zA-Z0-9]*", "", txt).strip()
-            if txt.endswith("```"):
-                txt = txt[:-3].strip()
-        return txt
-
     def _snippet(text: str, limit: int = 400) -> str:
         clipped = text[:limit].replace("\n", " ").replace("\r", " ")
         try:
@@ -1098,26 +1430,26 @@ def _parse_llm_json(content: str) -> Any:
 
     content = _strip_code_fence(content)
     try:
-        return json.loads(content)
+        return _loads(content)
     except Exception:
         pass
     try:
         return json.JSONDecoder(strict=False).decode(content)
     except Exception:
         pass
-    match = re.search(r"\{.*\}", content, re.DOTALL)
+    match = _RE_JSON_OBJ.search(content)
     if match:
         snippet = _strip_code_fence(match.group(0))
         try:
-            return json.loads(snippet)
+            return _loads(snippet)
         except Exception as exc:
             try:
                 return json.JSONDecoder(strict=False).decode(snippet)
             except Exception:
                 pass
-            cleaned = re.sub(r",\s*([}\]])", r"\1", snippet)
+            cleaned = _RE_TRAILING_COMMA.sub(r"\1", snippet)
             try:
-                return json.loads(cleaned)
+                return _loads(cleaned)
             except Exception:
                 raise RuntimeError(f"LLM JSON could not be parsed. Snippet: {_snippet(snippet)}") from exc
     raise RuntimeError(f"LLM JSON could not be parsed. Snippet: {_snippet(content)}")
@@ -1646,45 +1978,54 @@ def init_aggregate() -> Dict[str, Any]:
 
 
 def update_aggregate(agg: Dict[str, Any], sample_result: Dict[str, Any]) -> None:
+    # Runs once per sample x method; bind the shared sub-dicts and getters to
+    # locals so the inner loop does one hash lookup per stat, not three.
     agg["sample_count"] += 1
+    agg_fields = agg["fields"]
+    agg_errors = agg["field_errors"]
+    sample_errors = sample_result["field_errors"]
     for path, metrics in sample_result["fields"].items():
-        stats = agg["fields"][path]
+        stats = agg_fields[path]
+        get = metrics.get
         stats["count"] += 1
-        if metrics.get("present"):
+        if get("present"):
             stats["present"] += 1
-        stats["exact"] += metrics.get("exact", 0)
-        stats["normalized"] += metrics.get("normalized", 0)
-        stats["token_f1_sum"] += metrics.get("token_f1", 0.0)
-        stats["jaccard_sum"] += metrics.get("jaccard", 0.0)
-        stats["char_sim_sum"] += metrics.get("char_sim", 0.0)
-        numeric = metrics.get("numeric", {})
+        stats["exact"] += get("exact", 0)
+        stats["normalized"] += get("normalized", 0)
+        stats["token_f1_sum"] += get("token_f1", 0.0)
+        stats["jaccard_sum"] += get("jaccard", 0.0)
+        stats["char_sim_sum"] += get("char_sim", 0.0)
+        numeric = get("numeric", {})
         if numeric:
             stats["numeric_count"] += 1
             stats["abs_err_sum"] += numeric.get("abs_err", 0.0)
             stats["rel_err_sum"] += numeric.get("rel_err", 0.0)
             if numeric.get("within_tol"):
                 stats["within_tol"] += 1
-        date_metric = metrics.get("date", {})
+        date_metric = get("date", {})
         if date_metric:
             stats["date_count"] += 1
             stats["date_err_sum"] += date_metric.get("abs_days", 0.0)
         # Track worst examples per field
-        errors = sample_result["field_errors"].get(path, [])
+        errors = sample_errors.get(path, [])
         if errors:
-            agg["field_errors"][path].extend(errors)
+            agg_errors[path].extend(errors)
 
     item = sample_result["items"]
     if item.get("skip"):
         return
-    agg["item"]["samples"] += 1
-    agg["item"]["gt_count"] += item.get("gt_count", 0)
-    agg["item"]["pred_count"] += item.get("pred_count", 0)
-    agg["item"]["matched"] += item.get("matched", 0)
+    item_agg = agg["item"]
+    item_agg["samples"] += 1
+    item_agg["gt_count"] += item.get("gt_count", 0)
+    item_agg["pred_count"] += item.get("pred_count", 0)
+    item_agg["matched"] += item.get("matched", 0)
     field_scores = item.get("field_scores", {})
+    agg_scores = item_agg["field_scores"]
     for spec in ITEM_FIELD_SPECS:
         scores = field_scores.get(spec.path, {})
-        agg["item"]["field_scores"][spec.path]["total"] += scores.get("total", 0)
-        agg["item"]["field_scores"][spec.path]["correct"] += scores.get("correct", 0)
+        spec_agg = agg_scores[spec.path]
+        spec_agg["total"] += scores.get("total", 0)
+        spec_agg["correct"] += scores.get("correct", 0)
 
 
 def finalize_aggregate(agg: Dict[str, Any]) -> Dict[str, Any]:
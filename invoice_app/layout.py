@@ -759,7 +759,8 @@ def build_layout(app):
             html.Label("Raw LLM output (first 1–2 samples)"),
             html.Pre(id="ds-log", className="json-editor", style={"minHeight": "140px"}),
             dcc.Store(id="ds-job-id"),
-            dcc.Interval(id="ds-progress-interval", interval=800, n_intervals=0, disabled=False),
+            dcc.Store(id="ds-poll-version"),
+            dcc.Interval(id="ds-progress-interval", interval=800, n_intervals=0, disabled=True),
         ],
     )
 
@@ -1065,12 +1066,15 @@ def build_layout(app):
         className="page-shell",
         children=[
             dcc.Store(id="payload-store"),
+            dcc.Store(id="pending-json-sync"),
             dcc.Store(id="selection-store"),
             dcc.Store(id="ocr-pdf-pages"),
             dcc.Store(id="ocr-items"),
             dcc.Store(id="ds-prompt-store"),
             dcc.Store(id="eval-job-id"),
+            dcc.Store(id="eval-progress-store"),
             dcc.Store(id="eval-results-store"),
+            dcc.Store(id="eval-download-nav"),
             dcc.Store(id="eval-uploaded-dataset-path"),
             dcc.Download(id="download-invoice"),
             dcc.Download(id="download-pdf"),
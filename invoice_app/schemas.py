@@ -0,0 +1,76 @@
+"""Optional msgspec schemas for hot-path JSON decoding.
+
+msgspec decodes against a declared schema several times faster than a
+generic parser because it allocates one Python object per declared field
+instead of one per JSON node. Everything here degrades gracefully: the
+helpers return None when msgspec is not installed (or the document does
+not match the schema) so callers can fall back to their generic parsers.
+"""
+
+from typing import Any, Dict, List, Optional, Union
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+if msgspec is not None:
+
+    class OCRItem(msgspec.Struct):
+        x0: float
+        y0: float
+        x1: float
+        y1: float
+        page: int = 1
+        text: str = ""
+
+    class OCRDocument(msgspec.Struct):
+        items: List[OCRItem]
+
+    class Sample(msgspec.Struct):
+        template: Dict[str, Any]
+        data: Dict[str, Any]
+
+    _OCR_DOC_DECODER = msgspec.json.Decoder(OCRDocument)
+    _OCR_LIST_DECODER = msgspec.json.Decoder(List[OCRItem])
+    _SAMPLE_DECODER = msgspec.json.Decoder(Sample)
+
+
+def decode_ocr_items(raw: Union[str, bytes]) -> Optional[List[Dict[str, Any]]]:
+    """Decode {"items": [...]} or a bare item array into plain dicts.
+
+    Returns None when msgspec is unavailable or the document does not fit
+    the schema (e.g. nested "ocr" wrappers or malformed boxes), in which
+    case the caller's lenient parser takes over.
+    """
+    if msgspec is None:
+        return None
+    try:
+        items = _OCR_DOC_DECODER.decode(raw).items
+    except msgspec.DecodeError:
+        try:
+            items = _OCR_LIST_DECODER.decode(raw)
+        except msgspec.DecodeError:
+            return None
+    return [
+        {"page": item.page, "x0": item.x0, "y0": item.y0, "x1": item.x1, "y1": item.y1, "text": item.text}
+        for item in items
+    ]
+
+
+def decode_sample(raw: Union[str, bytes]) -> Optional[Dict[str, Any]]:
+    """Decode a generated sample envelope ({"template": {...}, "data": {...}}).
+
+    Returns the payload as a plain dict, or None when msgspec is
+    unavailable or the content does not match the envelope (wrapper keys,
+    stringified sections, ...), in which case the caller's repair path
+    (_parse_llm_json/_coerce_payload) takes over.
+    """
+    if msgspec is None:
+        return None
+    try:
+        sample = _SAMPLE_DECODER.decode(raw)
+    except msgspec.DecodeError:
+        return None
+    return {"template": sample.template, "data": sample.data}
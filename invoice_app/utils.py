@@ -1,4 +1,5 @@
 import base64
+import functools
 import json
 import mimetypes
 import os
@@ -8,6 +9,11 @@ import tempfile
 from pathlib import Path
 from typing import Any, Dict, Optional, Tuple
 
+try:  # Optional accelerator; stdlib json stays as the fallback.
+    import orjson
+except ImportError:
+    orjson = None
+
 
 def decode_uploaded_text(contents: str) -> str:
     """Dash Upload provides a base64 payload; decode it into UTF-8 text."""
@@ -21,7 +27,7 @@ def decode_uploaded_text(contents: str) -> str:
 
 def parse_payload(text: str) -> Dict[str, Any]:
     """Load JSON string and ensure template + data keys exist."""
-    payload = json.loads(text)
+    payload = orjson.loads(text) if orjson is not None else json.loads(text)
     if not isinstance(payload, dict):
         raise ValueError("The JSON root must be an object.")
 
@@ -30,8 +36,12 @@ def parse_payload(text: str) -> Dict[str, Any]:
     return payload
 
 
-def _tokenize_path(path: str) -> list[str]:
-    """Split dotted paths and bracket indices into tokens (e.g., items[0].name -> ["items", "0", "name"])."""
+@functools.lru_cache(maxsize=1024)
+def _tokenize_path(path: str) -> tuple[str, ...]:
+    """Split dotted paths and bracket indices into tokens (e.g., items[0].name -> ("items", "0", "name")).
+
+    Paths repeat heavily across clicks, so the tokenization is cached.
+    """
     tokens: list[str] = []
     for segment in str(path).split("."):
         buf = segment
@@ -45,7 +55,7 @@ def _tokenize_path(path: str) -> list[str]:
             buf = remainder
         if buf:
             tokens.append(buf)
-    return tokens
+    return tuple(tokens)
 
 
 def dotted_get(data: Any, path: str, default: Any = "") -> Any:
@@ -202,8 +212,14 @@ def parse_table_totals(text: str) -> list[Dict[str, Any]]:
     return totals
 
 
-def build_ocr_ground_truth(pdf_bytes: bytes, require_items: bool = False) -> str:
-    """Extract text boxes from a PDF and return JSON with positions."""
+def _items_json_bytes(items: list) -> bytes:
+    if orjson is not None:
+        return orjson.dumps({"items": items}, option=orjson.OPT_INDENT_2)
+    return json.dumps({"items": items}, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def build_ocr_ground_truth(pdf_bytes: bytes, require_items: bool = False) -> bytes:
+    """Extract text boxes from a PDF and return UTF-8 JSON bytes with positions."""
     try:
         import fitz  # PyMuPDF
     except Exception as exc:  # noqa: BLE001
@@ -227,7 +243,7 @@ def build_ocr_ground_truth(pdf_bytes: bytes, require_items: bool = False) -> str
             )
     doc.close()
     if items:
-        return json.dumps({"items": items}, ensure_ascii=False, indent=2)
+        return _items_json_bytes(items)
 
     # Fallback to OCR if the PDF has no selectable text.
     tesseract_cmd = _find_tesseract()
@@ -236,7 +252,7 @@ def build_ocr_ground_truth(pdf_bytes: bytes, require_items: bool = False) -> str
             raise RuntimeError(
                 "No selectable text found and tesseract is not available. Install Tesseract (add it to PATH) and retry."
             )
-        return json.dumps({"items": []}, ensure_ascii=False, indent=2)
+        return _items_json_bytes([])
 
     def _pdf_pages_to_images() -> list[bytes]:
         doc_local = fitz.open(stream=pdf_bytes, filetype="pdf")
@@ -298,11 +314,11 @@ def build_ocr_ground_truth(pdf_bytes: bytes, require_items: bool = False) -> str
             ocr_items.extend(_tesseract_items(img_bytes, idx))
         if require_items and not ocr_items:
             raise RuntimeError("OCR produced no text boxes. Try different OCR settings or font/contrast choices.")
-        return json.dumps({"items": ocr_items}, ensure_ascii=False, indent=2)
+        return _items_json_bytes(ocr_items)
     except Exception:
         if require_items:
             raise
-        return json.dumps({"items": []}, ensure_ascii=False, indent=2)
+        return _items_json_bytes([])
 
 
 def _find_tesseract() -> Optional[str]: